@@ -530,22 +530,11 @@ else:
                 )
                 
                 if projections:
-                    # Отображаем все три проекции одновременно
-                    st.markdown("### 📍 Проекция XY (вид сверху)")
-                    st.plotly_chart(projections['XY'], use_container_width=True)
-                    st.caption("Вид сверху: показывает горизонтальное отклонение скважины")
-                    
-                    st.divider()
-                    
-                    st.markdown("### 📏 Проекция XZ (вид сбоку)")
-                    st.plotly_chart(projections['XZ'], use_container_width=True)
-                    st.caption("Вид сбоку (X-Z): показывает отклонение по оси X и глубину")
-                    
-                    st.divider()
-                    
-                    st.markdown("### 📐 Проекция YZ (вид сбоку)")
-                    st.plotly_chart(projections['YZ'], use_container_width=True)
-                    st.caption("Вид сбоку (Y-Z): показывает отклонение по оси Y и глубину")
+                    # Все три проекции в одной фигуре — один WebGL-контекст
+                    st.markdown("### 📍 Проекции траектории (XY, XZ, YZ)")
+                    st.plotly_chart(projections['combined'], use_container_width=True)
+                    st.caption("XY — вид сверху (горизонтальное отклонение); "
+                               "XZ и YZ — виды сбоку с глубиной")
                 else:
                     st.warning(f"Не удалось создать проекции для {selected_well}")
             else:
@@ -934,9 +923,11 @@ else:
 
                 # Собираем координаты существующих скважин
                 if not st.session_state.well_data.empty:
-                    for _, row in st.session_state.well_data.iterrows():
-                        if pd.notna(row.get('X')) and pd.notna(row.get('Y')):
-                            existing_coords.append((row['X'], row['Y']))
+                    # itertuples вместо iterrows: без Series на каждую строку
+                    for x, y in st.session_state.well_data[['X', 'Y']].itertuples(
+                            index=False, name=None):
+                        if pd.notna(x) and pd.notna(y):
+                            existing_coords.append((x, y))
 
                 # Генерируем новые координаты рядом с существующими
                 for i in range(num_predictions):
@@ -1,14 +1,29 @@
 """
 Модуль для работы с PostgreSQL базой данных
 """
+import io
 import os
 from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 import psycopg2
-from psycopg2.extras import execute_batch
+from psycopg2.extensions import AsIs, Float, register_adapter
+from psycopg2.extras import execute_values
 from psycopg2.pool import SimpleConnectionPool
 
+# Порог, начиная с которого массовая вставка идёт через COPY вместо INSERT
+_COPY_THRESHOLD = 500
+
+# psycopg2 не знает numpy-типы: регистрируем адаптеры один раз на модуль,
+# чтобы скаляры numpy уходили в драйвер напрямую, без float()/int()
+# на каждое значение в вызывающем коде
+register_adapter(np.float64, lambda v: Float(float(v)))
+register_adapter(np.float32, lambda v: Float(float(v)))
+register_adapter(np.int64, lambda v: AsIs(int(v)))
+register_adapter(np.int32, lambda v: AsIs(int(v)))
+register_adapter(np.int16, lambda v: AsIs(int(v)))
+register_adapter(np.int8, lambda v: AsIs(int(v)))
+
 
 class DatabaseManager:
     """Менеджер для работы с базой данных PostgreSQL"""
@@ -54,47 +69,84 @@ class DatabaseManager:
         """Закрыть все соединения"""
         if self.pool:
             self.pool.closeall()
+
+    @staticmethod
+    def _bulk_insert(cur, table: str, columns: Tuple[str, ...], rows: List[Tuple]):
+        """
+        Массовая вставка строк в таблицу
+
+        Для небольших партий используется многострочный INSERT (execute_values),
+        для больших — COPY FROM STDIN, у которого фиксированная цена запуска
+        окупается только на тысячах строк.
+        """
+        if not rows:
+            return
+
+        cols_sql = ', '.join(columns)
+
+        if len(rows) < _COPY_THRESHOLD:
+            execute_values(cur, f"INSERT INTO {table} ({cols_sql}) VALUES %s", rows)
+        else:
+            buf = io.StringIO()
+            for row in rows:
+                buf.write(','.join('' if v is None else str(v) for v in row))
+                buf.write('\n')
+            buf.seek(0)
+            cur.copy_expert(
+                f"COPY {table} ({cols_sql}) FROM STDIN WITH (FORMAT CSV)",
+                buf
+            )
     
     # ========== WELLS ==========
     
+    def _save_well(self, cur, name: str, x: float, y: float, z: float,
+                   h: float = None, eff_h: float = None) -> int:
+        """
+        Сохранить скважину через готовый курсор (без commit)
+
+        Returns:
+            ID созданной скважины
+        """
+        # Конвертируем numpy типы в Python типы
+        x = float(x) if x is not None else None
+        y = float(y) if y is not None else None
+        z = float(z) if z is not None else None
+        h = float(h) if h is not None and not pd.isna(h) else None
+        eff_h = float(eff_h) if eff_h is not None and not pd.isna(eff_h) else None
+
+        collector_ratio = (eff_h / h) if (h and eff_h and h > 0) else None
+
+        cur.execute("""
+            INSERT INTO wells (name, x, y, z, h, eff_h, collector_ratio)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (name) DO UPDATE SET
+                x = EXCLUDED.x,
+                y = EXCLUDED.y,
+                z = EXCLUDED.z,
+                h = EXCLUDED.h,
+                eff_h = EXCLUDED.eff_h,
+                collector_ratio = EXCLUDED.collector_ratio,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING id
+        """, (name, x, y, z, h, eff_h, collector_ratio))
+
+        return cur.fetchone()[0]
+
     def save_well(self, name: str, x: float, y: float, z: float,
                   h: float = None, eff_h: float = None) -> int:
         """
         Сохранить скважину в БД
-        
+
         Returns:
             ID созданной скважины
         """
         conn = self.get_connection()
         if not conn:
             return None
-        
+
         try:
             with conn.cursor() as cur:
-                # Конвертируем numpy типы в Python типы
-                x = float(x) if x is not None else None
-                y = float(y) if y is not None else None
-                z = float(z) if z is not None else None
-                h = float(h) if h is not None and not pd.isna(h) else None
-                eff_h = float(eff_h) if eff_h is not None and not pd.isna(eff_h) else None
-                
-                collector_ratio = (eff_h / h) if (h and eff_h and h > 0) else None
-                
-                cur.execute("""
-                    INSERT INTO wells (name, x, y, z, h, eff_h, collector_ratio)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (name) DO UPDATE SET
-                        x = EXCLUDED.x,
-                        y = EXCLUDED.y,
-                        z = EXCLUDED.z,
-                        h = EXCLUDED.h,
-                        eff_h = EXCLUDED.eff_h,
-                        collector_ratio = EXCLUDED.collector_ratio,
-                        updated_at = CURRENT_TIMESTAMP
-                    RETURNING id
-                """, (name, x, y, z, h, eff_h, collector_ratio))
-                
-                well_id = cur.fetchone()[0]
+                well_id = self._save_well(cur, name, x, y, z, h, eff_h)
                 conn.commit()
                 return well_id
         except Exception as e:
@@ -150,10 +202,45 @@ class DatabaseManager:
     
     # ========== TRAJECTORIES ==========
     
+    def _save_trajectory(self, cur, well_name: str, trajectory: np.ndarray):
+        """
+        Сохранить траекторию скважины через готовый курсор (без commit)
+
+        Args:
+            cur: курсор открытого соединения
+            well_name: Название скважины
+            trajectory: Массив [X, Y, Z, MD]
+        """
+        # Получаем ID скважины используя то же соединение
+        cur.execute("SELECT id FROM wells WHERE name = %s", (well_name,))
+        row = cur.fetchone()
+
+        if not row:
+            # Создаем скважину если её нет
+            cur.execute("""
+                INSERT INTO wells (name, x, y, z)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+            """, (well_name, float(trajectory[0, 0]), float(trajectory[0, 1]), float(trajectory[0, 2])))
+            well_id = cur.fetchone()[0]
+        else:
+            well_id = row[0]
+
+        # Удаляем старые точки траектории
+        cur.execute("DELETE FROM trajectories WHERE well_id = %s", (well_id,))
+
+        # Вставляем новые точки: одна конвертация tolist() в C-цикле
+        # вместо четырёх float() на каждую точку
+        points = np.ascontiguousarray(trajectory[:, :4], dtype=np.float64).tolist()
+        data = [(well_id, i, x, y, z, md) for i, (x, y, z, md) in enumerate(points)]
+
+        self._bulk_insert(cur, 'trajectories',
+                          ('well_id', 'point_index', 'x', 'y', 'z', 'md'), data)
+
     def save_trajectory(self, well_name: str, trajectory: np.ndarray):
         """
         Сохранить траекторию скважины
-        
+
         Args:
             well_name: Название скважины
             trajectory: Массив [X, Y, Z, MD]
@@ -161,38 +248,10 @@ class DatabaseManager:
         conn = self.get_connection()
         if not conn:
             return False
-        
+
         try:
             with conn.cursor() as cur:
-                # Получаем ID скважины используя то же соединение
-                cur.execute("SELECT id FROM wells WHERE name = %s", (well_name,))
-                row = cur.fetchone()
-                
-                if not row:
-                    # Создаем скважину если её нет
-                    cur.execute("""
-                        INSERT INTO wells (name, x, y, z)
-                        VALUES (%s, %s, %s, %s)
-                        RETURNING id
-                    """, (well_name, float(trajectory[0, 0]), float(trajectory[0, 1]), float(trajectory[0, 2])))
-                    well_id = cur.fetchone()[0]
-                else:
-                    well_id = row[0]
-                
-                # Удаляем старые точки траектории
-                cur.execute("DELETE FROM trajectories WHERE well_id = %s", (well_id,))
-                
-                # Вставляем новые точки
-                data = [
-                    (well_id, i, float(point[0]), float(point[1]), float(point[2]), float(point[3]))
-                    for i, point in enumerate(trajectory)
-                ]
-                
-                execute_batch(cur, """
-                    INSERT INTO trajectories (well_id, point_index, x, y, z, md)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, data)
-                
+                self._save_trajectory(cur, well_name, trajectory)
                 conn.commit()
                 return True
         except Exception as e:
@@ -252,15 +311,51 @@ class DatabaseManager:
     
     # ========== LAS DATA ==========
     
+    def _save_las_data(self, cur, well_name: str, depth: np.ndarray, curve: np.ndarray):
+        """
+        Сохранить LAS данные через готовый курсор (без commit)
+
+        Args:
+            cur: курсор открытого соединения
+            well_name: Название скважины
+            depth: Массив глубин (MD)
+            curve: Массив значений кривой (0=неколлектор, 1=коллектор)
+        """
+        cur.execute("SELECT id FROM wells WHERE name = %s", (well_name,))
+        row = cur.fetchone()
+        if not row:
+            return False
+
+        well_id = row[0]
+
+        # Удаляем старые данные
+        cur.execute("DELETE FROM las_data WHERE well_id = %s", (well_id,))
+
+        # Вставляем новые данные
+        # ВАЖНО: curve_value ДОЛЖНО быть строго 0 или 1 (INTEGER)
+        # Преобразуем к бинарным значениям если нужно
+        data = []
+        for d, c in zip(depth, curve):
+            if c == -999.25 or np.isnan(c):
+                continue
+
+            # Преобразуем к бинарному значению (0 или 1)
+            binary_value = 1 if float(c) >= 0.5 else 0
+            data.append((well_id, float(d), binary_value))
+
+        self._bulk_insert(cur, 'las_data', ('well_id', 'depth', 'curve_value'), data)
+
+        return True
+
     def save_las_data(self, well_name: str, depth: np.ndarray, curve: np.ndarray):
         """
         Сохранить LAS данные (включая ML предсказания)
-        
+
         Args:
             well_name: Название скважины
             depth: Массив глубин (MD)
             curve: Массив значений кривой (0=неколлектор, 1=коллектор)
-        
+
         Note:
             Значения curve должны быть 0 или 1 (бинарная классификация).
             ML предсказания также сохраняются через этот метод.
@@ -268,37 +363,12 @@ class DatabaseManager:
         conn = self.get_connection()
         if not conn:
             return False
-        
+
         try:
-            well = self.get_well_by_name(well_name)
-            if not well:
-                return False
-            
-            well_id = well['id']
-            
             with conn.cursor() as cur:
-                # Удаляем старые данные
-                cur.execute("DELETE FROM las_data WHERE well_id = %s", (well_id,))
-                
-                # Вставляем новые данные
-                # ВАЖНО: curve_value ДОЛЖНО быть строго 0 или 1 (INTEGER)
-                # Преобразуем к бинарным значениям если нужно
-                data = []
-                for d, c in zip(depth, curve):
-                    if c == -999.25 or np.isnan(c):
-                        continue
-                    
-                    # Преобразуем к бинарному значению (0 или 1)
-                    binary_value = 1 if float(c) >= 0.5 else 0
-                    data.append((well_id, float(d), binary_value))
-                
-                execute_batch(cur, """
-                    INSERT INTO las_data (well_id, depth, curve_value)
-                    VALUES (%s, %s, %s)
-                """, data)
-                
+                success = self._save_las_data(cur, well_name, depth, curve)
                 conn.commit()
-                return True
+                return success
         except Exception as e:
             conn.rollback()
             print(f"Ошибка сохранения LAS данных: {e}")
@@ -393,60 +463,78 @@ class DatabaseManager:
         las_saved = 0
         las_failed = 0
         
+        conn = self.get_connection()
+        if not conn:
+            return False
+
         try:
-            # Сохраняем скважины
-            print(f"Сохранение {len(well_data)} скважин...")
-            for _, row in well_data.iterrows():
-                try:
-                    well_id = self.save_well(
-                        row['Well'],
-                        row['X'],
-                        row['Y'],
-                        row['Z'],
-                        row.get('H'),
-                        row.get('EFF_H')
-                    )
-                    if well_id:
-                        wells_saved += 1
-                    else:
+            # Одно соединение на всю загрузку: commit один раз на фазу,
+            # savepoint на запись, чтобы ошибка не откатывала всю фазу
+            with conn.cursor() as cur:
+                # Сохраняем скважины
+                print(f"Сохранение {len(well_data)} скважин...")
+                # itertuples вместо iterrows: без построения Series на строку
+                h_values = well_data['H'] if 'H' in well_data.columns else None
+                eff_h_values = well_data['EFF_H'] if 'EFF_H' in well_data.columns else None
+                for i, (well, x, y, z) in enumerate(
+                        well_data[['Well', 'X', 'Y', 'Z']].itertuples(index=False,
+                                                                      name=None)):
+                    try:
+                        cur.execute("SAVEPOINT bulk_item")
+                        well_id = self._save_well(
+                            cur,
+                            well,
+                            x,
+                            y,
+                            z,
+                            h_values.iloc[i] if h_values is not None else None,
+                            eff_h_values.iloc[i] if eff_h_values is not None else None
+                        )
+                        if well_id:
+                            wells_saved += 1
+                        else:
+                            wells_failed += 1
+                            print(f"  ⚠️ Не удалось сохранить скважину {well}")
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT bulk_item")
                         wells_failed += 1
-                        print(f"  ⚠️ Не удалось сохранить скважину {row['Well']}")
-                except Exception as e:
-                    wells_failed += 1
-                    print(f"  ❌ Ошибка сохранения скважины {row['Well']}: {e}")
-            
-            print(f"✅ Скважины: {wells_saved} сохранено, {wells_failed} ошибок")
-            
-            # Сохраняем траектории
-            print(f"Сохранение {len(trajectories)} траекторий...")
-            for well_name, trajectory in trajectories.items():
-                try:
-                    success = self.save_trajectory(well_name, trajectory)
-                    if success:
+                        print(f"  ❌ Ошибка сохранения скважины {well}: {e}")
+                conn.commit()
+
+                print(f"✅ Скважины: {wells_saved} сохранено, {wells_failed} ошибок")
+
+                # Сохраняем траектории
+                print(f"Сохранение {len(trajectories)} траекторий...")
+                for well_name, trajectory in trajectories.items():
+                    try:
+                        cur.execute("SAVEPOINT bulk_item")
+                        self._save_trajectory(cur, well_name, trajectory)
                         trajectories_saved += 1
-                    else:
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT bulk_item")
                         trajectories_failed += 1
-                        print(f"  ⚠️ Не удалось сохранить траекторию {well_name}")
-                except Exception as e:
-                    trajectories_failed += 1
-                    print(f"  ❌ Ошибка сохранения траектории {well_name}: {e}")
-            
-            print(f"✅ Траектории: {trajectories_saved} сохранено, {trajectories_failed} ошибок")
-            
-            # Сохраняем LAS данные
-            print(f"Сохранение {len(las_data)} LAS файлов...")
-            for well_name, las in las_data.items():
-                try:
-                    success = self.save_las_data(well_name, las['depth'], las['curve'])
-                    if success:
-                        las_saved += 1
-                    else:
+                        print(f"  ❌ Ошибка сохранения траектории {well_name}: {e}")
+                conn.commit()
+
+                print(f"✅ Траектории: {trajectories_saved} сохранено, {trajectories_failed} ошибок")
+
+                # Сохраняем LAS данные
+                print(f"Сохранение {len(las_data)} LAS файлов...")
+                for well_name, las in las_data.items():
+                    try:
+                        cur.execute("SAVEPOINT bulk_item")
+                        success = self._save_las_data(cur, well_name, las['depth'], las['curve'])
+                        if success:
+                            las_saved += 1
+                        else:
+                            las_failed += 1
+                            print(f"  ⚠️ Не удалось сохранить LAS данные {well_name}")
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT bulk_item")
                         las_failed += 1
-                        print(f"  ⚠️ Не удалось сохранить LAS данные {well_name}")
-                except Exception as e:
-                    las_failed += 1
-                    print(f"  ❌ Ошибка сохранения LAS данных {well_name}: {e}")
-            
+                        print(f"  ❌ Ошибка сохранения LAS данных {well_name}: {e}")
+                conn.commit()
+
             print(f"✅ LAS данные: {las_saved} сохранено, {las_failed} ошибок")
             
             # Итоговая статистика
@@ -464,7 +552,10 @@ class DatabaseManager:
             
             return success_rate >= 50
         except Exception as e:
+            conn.rollback()
             print(f"❌ Критическая ошибка загрузки данных в БД: {e}")
             import traceback
             traceback.print_exc()
-            return False
\ No newline at end of file
+            return False
+        finally:
+            self.put_connection(conn)
\ No newline at end of file
@@ -1,6 +1,7 @@
 """
 Модуль для загрузки всех типов данных
 """
+import io
 import os
 from typing import Dict
 
@@ -23,39 +24,50 @@ def load_welltrajectories(filepath: str) -> Dict[str, np.ndarray]:
 
     with open(filepath, 'r', encoding='utf-8') as f:
         lines = f.readlines()
-        current_well = None
-        well_data = []
 
-        for line in lines:
-            line = line.strip()
-
-            # Ищем начало новой скважины
-            if 'welltrack' in line.lower() and "'" in line:
-                # Сохраняем предыдущую скважину
-                if current_well and well_data:
-                    trajectories[current_well] = np.array(well_data)
-
-                # Начинаем новую скважину
-                current_well = line.split("'")[1]
-                well_data = []
-
-            # Пропускаем пустые строки и строки с комментариями
-            elif not line or ';' in line:
-                continue
-
-            # Читаем данные траектории
-            elif current_well:
-                parts = line.split()
+    # Разбиваем файл на текстовые блоки по скважинам,
+    # числа парсим одним np.loadtxt на блок вместо накопления списка списков
+    blocks = []
+    current_lines = None
+
+    for line in lines:
+        line = line.strip()
+
+        # Ищем начало новой скважины
+        if 'welltrack' in line.lower() and "'" in line:
+            current_lines = []
+            blocks.append((line.split("'")[1], current_lines))
+
+        # Пропускаем пустые строки и строки с комментариями
+        elif not line or ';' in line:
+            continue
+
+        # Накапливаем строки данных траектории
+        elif current_lines is not None:
+            current_lines.append(line)
+
+    for well_name, data_lines in blocks:
+        if not data_lines:
+            continue
+
+        try:
+            well_data = np.loadtxt(io.StringIO('\n'.join(data_lines)),
+                                   usecols=(0, 1, 2, 3), ndmin=2)
+        except ValueError:
+            # В блоке есть некорректные строки — разбираем построчно, как раньше
+            parsed = []
+            for data_line in data_lines:
+                parts = data_line.split()
                 if len(parts) >= 4:
                     try:
-                        x, y, z, md = map(float, parts[:4])
-                        well_data.append([x, y, z, md])
+                        parsed.append([float(p) for p in parts[:4]])
                     except ValueError:
                         continue
+            if not parsed:
+                continue
+            well_data = np.array(parsed)
 
-        # Сохраняем последнюю скважину
-        if current_well and well_data:
-            trajectories[current_well] = np.array(well_data)
+        trajectories[well_name] = well_data
 
     return trajectories
 
@@ -94,6 +106,45 @@ def load_eff_h_data(filepath: str) -> pd.DataFrame:
     return df
 
 
+def _fast_read_las(filepath: str) -> Dict:
+    """
+    Быстрый парсер для типовых LAS-файлов проекта (DEPT + одна кривая)
+
+    lasio.read разбирает все секции и кривые; здесь читаем из заголовка
+    только имя скважины, а секцию ~Ascii загружаем одним np.loadtxt.
+    Возвращает None, если файл не подходит под этот формат.
+    """
+    well_name = None
+    data_start = None
+
+    with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+        for i, line in enumerate(f):
+            stripped = line.strip()
+            if stripped.upper().startswith('WELL.'):
+                # Формат строки: WELL.    WELL_001 : WELL
+                value = stripped.split('.', 1)[1].split(':', 1)[0].strip()
+                well_name = value or None
+            elif stripped.startswith('~A'):
+                data_start = i + 1
+                break
+
+    if data_start is None:
+        return None
+
+    data = np.loadtxt(filepath, skiprows=data_start, usecols=(0, 1), ndmin=2)
+
+    # lasio заменяет NULL-значения на NaN — повторяем это поведение
+    curve = data[:, 1]
+    curve[curve == -999.25] = np.nan
+
+    return {
+        'well_name': well_name or os.path.basename(filepath).replace('.las', '').replace('.txt', ''),
+        'depth': data[:, 0],
+        'curve': curve,
+        'null_value': -999.25
+    }
+
+
 def load_las_file(filepath: str) -> Dict:
     """
     Загружает LAS-файл с данными ГИС
@@ -105,6 +156,14 @@ def load_las_file(filepath: str) -> Dict:
         Словарь с данными: {'depth': [], 'curve': [], 'well_name': str}
     """
     try:
+        # Сначала пробуем быстрый парсер, lasio оставляем как запасной вариант
+        try:
+            data = _fast_read_las(filepath)
+            if data is not None:
+                return data
+        except Exception:
+            pass
+
         las = lasio.read(filepath)
         well_name = las.well.WELL.value if hasattr(las.well, 'WELL') else os.path.basename(filepath).replace('.las',
                                                                                                              '').replace(
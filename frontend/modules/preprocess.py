@@ -20,13 +20,16 @@ def clean_las_data(las_data: Dict) -> Dict:
     if not las_data:
         return las_data
 
-    # Маски для валидных данных
-    valid_mask = las_data['curve'] != las_data['null_value']
+    # Маска валидных данных: NaN и NULL-значения отсекаются одним выражением,
+    # выборка идёт по целочисленным индексам — непрерывный gather вместо
+    # двух проходов по булевой маске
+    curve = las_data['curve']
+    valid = np.flatnonzero(np.isfinite(curve) & (curve != las_data['null_value']))
 
     return {
         'well_name': las_data['well_name'],
-        'depth': las_data['depth'][valid_mask],
-        'curve': las_data['curve'][valid_mask],
+        'depth': las_data['depth'][valid],
+        'curve': curve[valid],
         'null_value': las_data['null_value']
     }
 
@@ -46,19 +49,20 @@ def interpolate_trajectory(trajectory: np.ndarray, step: float = 1.0) -> np.ndar
         return trajectory
 
     md = trajectory[:, 3]
-    x = trajectory[:, 0]
-    y = trajectory[:, 1]
-    z = trajectory[:, 2]
+    xyz = trajectory[:, :3]
 
     # Создаем новые точки по MD
     new_md = np.arange(md[0], md[-1], step)
 
-    # Интерполируем координаты
-    new_x = np.interp(new_md, md, x)
-    new_y = np.interp(new_md, md, y)
-    new_z = np.interp(new_md, md, z)
+    # Интерполируем все три координаты за один поиск по MD:
+    # индексы отрезков и веса считаются один раз вместо трёх np.interp
+    idx = np.searchsorted(md, new_md, side='right') - 1
+    idx = np.clip(idx, 0, len(md) - 2)
+    t = (new_md - md[idx]) / (md[idx + 1] - md[idx])
+
+    new_xyz = xyz[idx] + (xyz[idx + 1] - xyz[idx]) * t[:, None]
 
-    return np.column_stack([new_x, new_y, new_z, new_md])
+    return np.column_stack([new_xyz, new_md])
 
 
 def create_grid_from_points(df: pd.DataFrame, grid_size: int = 100) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -72,17 +76,23 @@ def create_grid_from_points(df: pd.DataFrame, grid_size: int = 100) -> Tuple[np.
     Возвращает:
         X_grid, Y_grid, Z_grid
     """
-    # Преобразуем колонки в числа, если они строки
-    df = df.copy()
-    for col in ['X', 'Y', 'Z']:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Преобразуем колонки в числа, если они строки; копию делаем только
+    # когда коэрция действительно нужна — на уже числовом DataFrame
+    # это избавляет от удвоения памяти
+    needs_coerce = any(not pd.api.types.is_numeric_dtype(df[col])
+                       for col in ('X', 'Y', 'Z') if col in df.columns)
+    if needs_coerce:
+        df = df.copy()
+        for col in ['X', 'Y', 'Z']:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
 
     # Удаляем строки с NaN
     df = df.dropna(subset=['X', 'Y'])
 
-    x_min, x_max = df['X'].min(), df['X'].max()
-    y_min, y_max = df['Y'].min(), df['Y'].max()
+    # min и max за один проход по каждой колонке
+    x_min, x_max = df['X'].agg(['min', 'max'])
+    y_min, y_max = df['Y'].agg(['min', 'max'])
 
     # Добавляем небольшой отступ
     x_pad = (x_max - x_min) * 0.1
@@ -107,21 +117,25 @@ def prepare_ml_data(df: pd.DataFrame, las_dict: Dict) -> Dict:
     Возвращает:
         Словарь с подготовленными данными
     """
+    # float32 достаточно для координат и долей коллектора,
+    # а потребителям данных это вдвое снижает объём памяти
     ml_data = {
-        'coordinates': df[['X', 'Y', 'Z']].values,
-        'labels': df['Доля_коллектора'].values,
-        'well_names': df['Well'].values,
+        'coordinates': df[['X', 'Y', 'Z']].to_numpy(dtype=np.float32),
+        'labels': df['Доля_коллектора'].to_numpy(dtype=np.float32),
+        'well_names': df['Well'].to_numpy(copy=False),
         'las_data': {}
     }
 
-    # Добавляем LAS-данные для каждой скважины
-    for well_name in df['Well'].unique():
-        if well_name in las_dict:
-            clean_data = clean_las_data(las_dict[well_name])
-            ml_data['las_data'][well_name] = {
-                'depth': clean_data['depth'].tolist(),
-                'curve': clean_data['curve'].tolist()
-            }
+    # Добавляем LAS-данные для каждой скважины: идём только по пересечению
+    # множеств скважин, а не проверяем каждую через `in las_dict`.
+    # Массивы оставляем как ndarray: конвертация в списки боксила бы
+    # каждое значение и ломала векторную обработку дальше по конвейеру
+    for well_name in set(df['Well'].unique()) & set(las_dict):
+        clean_data = clean_las_data(las_dict[well_name])
+        ml_data['las_data'][well_name] = {
+            'depth': clean_data['depth'],
+            'curve': clean_data['curve']
+        }
 
     return ml_data
 
@@ -144,14 +158,16 @@ def filter_by_depth(las_data: Dict, min_depth: float = None, max_depth: float =
     depth = las_data['depth']
     curve = las_data['curve']
 
-    # Создаем маску для фильтрации
-    mask = np.ones_like(depth, dtype=bool)
-
-    if min_depth is not None:
-        mask = mask & (depth >= min_depth)
-
-    if max_depth is not None:
-        mask = mask & (depth <= max_depth)
+    # Строим маску без промежуточного np.ones_like:
+    # одно сравнение на заданную границу, slice(None) если границ нет
+    if min_depth is None and max_depth is None:
+        mask = slice(None)
+    elif max_depth is None:
+        mask = depth >= min_depth
+    elif min_depth is None:
+        mask = depth <= max_depth
+    else:
+        mask = (depth >= min_depth) & (depth <= max_depth)
 
     return {
         'well_name': las_data['well_name'],
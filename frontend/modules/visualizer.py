@@ -1,128 +1,677 @@
 """
 Модуль для визуализации данных
 """
+import hashlib
 from typing import Dict
 
 import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+# Палитры берём напрямую из plotly.colors: импорт plotly.express тянет
+# за собой тяжёлую цепочку зависимостей и заметно замедляет холодный старт
+from plotly.colors import qualitative as _qualitative
 
 from .ml_predictor import ml_predictor
 
+# orjson сериализует фигуры с float-массивами в разы быстрее stdlib json;
+# если он не установлен, Plotly остаётся на движке по умолчанию
+try:
+    pio.json.config.default_engine = 'orjson'
+except ValueError:
+    pass
+
+# Numba опционален: без него интерполяция координат идёт через NumPy
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True, nogil=True, fastmath=True, parallel=True)
+    def _interp_xyz_kernel(md_query, traj_md, traj_x, traj_y, traj_z):
+        """Бинарный поиск + лерп трёх координат одним проходом без временных"""
+        n = md_query.size
+        m = traj_md.size
+        out_x = np.empty(n)
+        out_y = np.empty(n)
+        out_z = np.empty(n)
+        # Точки независимы — бинарные поиски раскидываются по потокам
+        for i in prange(n):
+            q = md_query[i]
+            lo = 0
+            hi = m
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if traj_md[mid] <= q:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            idx = lo - 1
+            if idx < 0:
+                idx = 0
+            elif idx > m - 2:
+                idx = m - 2
+            t = (q - traj_md[idx]) / (traj_md[idx + 1] - traj_md[idx])
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            out_x[i] = traj_x[idx] + (traj_x[idx + 1] - traj_x[idx]) * t
+            out_y[i] = traj_y[idx] + (traj_y[idx + 1] - traj_y[idx]) * t
+            out_z[i] = traj_z[idx] + (traj_z[idx + 1] - traj_z[idx]) * t
+        return out_x, out_y, out_z
+
+    @njit(cache=True, nogil=True, fastmath=True)
+    def _segment_xyz_kernel(traj_md, traj_x, traj_y, traj_z,
+                            depth_valid, curve_valid):
+        """
+        Интерполяция XYZ по MD + разбиение на участки коллектор/неколлектор
+        одним jit-проходом: на выходе NaN-разделённые массивы зелёных (1)
+        и серых (0) участков и число участков каждого типа
+        """
+        n = depth_valid.size
+        m = traj_md.size
+
+        # Первый проход: размеры выходов (+1 точка NaN на каждый участок)
+        green_n = 0
+        gray_n = 0
+        green_segs = 0
+        gray_segs = 0
+        i = 0
+        while i < n:
+            v = curve_valid[i]
+            j = i + 1
+            while j < n and curve_valid[j] == v:
+                j += 1
+            if v == 1.0:
+                green_n += j - i + 1
+                green_segs += 1
+            elif v == 0.0:
+                gray_n += j - i + 1
+                gray_segs += 1
+            i = j
+
+        gx = np.empty(green_n)
+        gy = np.empty(green_n)
+        gz = np.empty(green_n)
+        hx = np.empty(gray_n)
+        hy = np.empty(gray_n)
+        hz = np.empty(gray_n)
+
+        # Второй проход: лерп координат и раскладка по выходам
+        gi = 0
+        hi_ = 0
+        i = 0
+        while i < n:
+            v = curve_valid[i]
+            j = i + 1
+            while j < n and curve_valid[j] == v:
+                j += 1
+            if v == 1.0 or v == 0.0:
+                for k in range(i, j):
+                    q = depth_valid[k]
+                    lo = 0
+                    hi = m
+                    while lo < hi:
+                        mid = (lo + hi) // 2
+                        if traj_md[mid] <= q:
+                            lo = mid + 1
+                        else:
+                            hi = mid
+                    idx = lo - 1
+                    if idx < 0:
+                        idx = 0
+                    elif idx > m - 2:
+                        idx = m - 2
+                    t = (q - traj_md[idx]) / (traj_md[idx + 1] - traj_md[idx])
+                    if t < 0.0:
+                        t = 0.0
+                    elif t > 1.0:
+                        t = 1.0
+                    x = traj_x[idx] + (traj_x[idx + 1] - traj_x[idx]) * t
+                    y = traj_y[idx] + (traj_y[idx + 1] - traj_y[idx]) * t
+                    z = traj_z[idx] + (traj_z[idx + 1] - traj_z[idx]) * t
+                    if v == 1.0:
+                        gx[gi] = x
+                        gy[gi] = y
+                        gz[gi] = z
+                        gi += 1
+                    else:
+                        hx[hi_] = x
+                        hy[hi_] = y
+                        hz[hi_] = z
+                        hi_ += 1
+                if v == 1.0:
+                    gx[gi] = np.nan
+                    gy[gi] = np.nan
+                    gz[gi] = np.nan
+                    gi += 1
+                else:
+                    hx[hi_] = np.nan
+                    hy[hi_] = np.nan
+                    hz[hi_] = np.nan
+                    hi_ += 1
+            i = j
+
+        return gx, gy, gz, green_segs, hx, hy, hz, gray_segs
+else:
+    _interp_xyz_kernel = None
+    _segment_xyz_kernel = None
+
+
+# Кэш готовых фигур: Streamlit перерисовывает страницу на каждом действии
+# пользователя, и тяжёлые фигуры пересобирались бы с неизменными данными.
+# Ключ — хэш входов, значение — собранная Figure (билдеры её не мутируют)
+_FIGURE_CACHE: Dict = {}
+_FIGURE_CACHE_MAX = 32
+
+
+def _inputs_digest(*parts) -> str:
+    """Стабильный в пределах процесса хэш входных данных фигуры"""
+    h = hashlib.blake2b(digest_size=16)
+
+    def update(part):
+        if part is None:
+            h.update(b'\x00')
+        elif isinstance(part, np.ndarray):
+            h.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, pd.DataFrame):
+            h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        elif isinstance(part, dict):
+            # Вложенные словари (например, предсказания по скважинам)
+            # обходятся рекурсивно
+            for key, value in part.items():
+                h.update(str(key).encode())
+                update(value)
+        else:
+            h.update(repr(part).encode())
+
+    for part in parts:
+        update(part)
+    return h.hexdigest()
+
+
+def _memoized_figure(name: str, builder, *parts) -> go.Figure:
+    """Возвращает фигуру из кэша либо строит и запоминает её"""
+    key = (name, _inputs_digest(*parts))
+    fig = _FIGURE_CACHE.get(key)
+    if fig is None:
+        fig = builder()
+        if len(_FIGURE_CACHE) >= _FIGURE_CACHE_MAX:
+            # Вытесняем самый старый ключ (dict сохраняет порядок вставки)
+            _FIGURE_CACHE.pop(next(iter(_FIGURE_CACHE)))
+        _FIGURE_CACHE[key] = fig
+    return fig
+
+
+def figure_to_json(fig: go.Figure) -> str:
+    """
+    Сериализует фигуру в JSON для передачи клиенту
+
+    Идёт через настроенный выше orjson-движок (NumPy-массивы кодируются
+    нативно, без .tolist()) и без повторной валидации — фигуры модуля
+    уже собраны из проверенных данных.
+    """
+    return pio.to_json(fig, validate=False)
+
+
+# Порог, после которого кривые и траектории прореживаются перед отрисовкой:
+# браузерный рендер Plotly заметно деградирует на сотнях тысяч точек
+_DOWNSAMPLE_THRESHOLD = 5000
+
+# Порог перехода с SVG-рендера (Scatter) на WebGL (Scattergl):
+# SVG начинает тормозить уже на нескольких тысячах точек, но для малых N
+# остаётся предпочтительным — полная поддержка стилей и чёткие линии
+_WEBGL_THRESHOLD = 5000
+
+# Палитра фиксируется на уровне модуля: обход атрибутов plotly.colors
+# и длина палитры не пересчитываются на каждый вызов и каждую скважину
+_PLOTLY_COLORS = tuple(_qualitative.Plotly)
+_NUM_COLORS = len(_PLOTLY_COLORS)
+
+# Число скважин, после которого 3D-траектории склеиваются в один трейс
+# с NaN-разделителями: plotly.js создаёт на каждый трейс отдельную
+# GL-программу, и время рендера растёт с числом трейсов, а не точек
+_MERGE_WELLS_THRESHOLD = 50
+
+# Постоянные куски макетов: plotly копирует словари при валидации фигуры,
+# поэтому шаблоны безопасно разделять между вызовами — вложенные словари
+# не пересоздаются при каждой перерисовке
+_SCENE_3D = dict(
+    xaxis_title="X",
+    yaxis_title="Y",
+    zaxis_title="Глубина Z",
+    aspectmode="manual",
+    aspectratio=dict(x=1, y=1, z=0.7)
+)
+_SCENE_RESERVOIR = dict(
+    xaxis_title="X (м)",
+    yaxis_title="Y (м)",
+    zaxis_title="Глубина Z (м)",
+    aspectmode="manual",
+    aspectratio=dict(x=1, y=1, z=0.7),
+    camera=dict(
+        eye=dict(x=1.5, y=1.5, z=1.2),
+        center=dict(x=0, y=0, z=-0.1)
+    ),
+    xaxis=dict(backgroundcolor="rgb(240, 240, 240)", gridcolor="white"),
+    yaxis=dict(backgroundcolor="rgb(240, 240, 240)", gridcolor="white"),
+    zaxis=dict(backgroundcolor="rgb(240, 240, 240)", gridcolor="white")
+)
+_LEGEND_TOP_LEFT = dict(yanchor="top", y=0.99, xanchor="left", x=0.01)
+_LEGEND_TOP_LEFT_BG = dict(yanchor="top", y=0.99, xanchor="left", x=0.01,
+                           bgcolor="rgba(255, 255, 255, 0.8)")
+_LEGEND_PROJECTION = dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.8)')
+_MARGIN_TIGHT = dict(l=0, r=0, t=40, b=0)
+
+# Постоянные стили трейсов проекций: одни и те же словари передаются
+# по ссылке во все трейсы — plotly копирует их при валидации фигуры,
+# а горячий цикл не собирает тысячи одинаковых литералов
+_BASE_LINE = dict(color='lightblue', width=2)
+_COLL_LINE = dict(color='green', width=4)
+_NONCOLL_LINE = dict(color='gray', width=3)
+_START_END_MARKER = dict(size=10, color=['blue', 'red'],
+                         symbol=['circle', 'diamond'])
+
+# Диспетчеризация класса сегмента по значению кривой — таблицей,
+# без ветвлений и повторения литералов в горячем цикле
+_SEGMENT_STYLES = ((1, _COLL_LINE, 'Коллектор (1)'),
+                   (0, _NONCOLL_LINE, 'Неколлектор (0)'))
+
+# Статичные части макетов проекций и ML-графиков: в вызове остаётся
+# только слияние с динамическим заголовком, без пересборки вложенных
+# словарей при каждой перерисовке
+_PROJECTION_LAYOUT_BASE = dict(
+    height=500,
+    hovermode='closest',
+    template='plotly_white',
+    showlegend=True,
+    legend=_LEGEND_PROJECTION
+)
+_ML_MAP_LAYOUT = dict(
+    title="Карта скважин с ML предсказаниями",
+    xaxis=dict(
+        title="Координата X (м)",
+        # Привязка масштаба задаётся только в одну сторону: встречная
+        # scaleanchor на yaxis заставляла plotly разрешать циклическое
+        # ограничение при каждой перерисовке
+        scaleanchor="y",
+        scaleratio=1
+    ),
+    yaxis=dict(title="Координата Y (м)"),
+    width=800,
+    height=600,
+    template='plotly_white'
+)
+_ML_DETAILS_LAYOUT = dict(
+    xaxis=dict(
+        title="Вероятность коллектора",
+        range=[-0.1, 1.1]
+    ),
+    yaxis=dict(
+        title="Глубина (м)",
+        autorange="reversed"  # Глубина увеличивается вниз
+    ),
+    width=600,
+    height=800,
+    template='plotly_white',
+    showlegend=True,
+    legend=dict(
+        x=0.02,
+        y=0.98,
+        bgcolor='rgba(255,255,255,0.8)'
+    )
+)
+_ML_CHART_LAYOUT = dict(
+    title="Сравнение доли коллектора: Реальные vs ML предсказания",
+    xaxis=dict(
+        title="Скважины",
+        tickangle=45
+    ),
+    yaxis=dict(
+        title="Доля коллектора",
+        range=[0, 1]
+    ),
+    width=800,
+    height=500,
+    template='plotly_white',
+    barmode='group'
+)
+
+
+def _minmax_downsample_idx(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Возвращает индексы прореживания сигнала до ~n_out точек
+
+    Диапазон режется на корзины, из каждой берутся минимум и максимум —
+    экстремумы (тонкие пики кривой) сохраняются, в отличие от шага-среза.
+    Первая и последняя точки включаются всегда.
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    n_bins = max(n_out // 2, 1)
+    edges = np.linspace(0, n, n_bins + 1).astype(np.intp)
+
+    keep = np.empty(2 * n_bins + 2, dtype=np.intp)
+    keep[0] = 0
+    keep[-1] = n - 1
+    for b in range(n_bins):
+        lo, hi = edges[b], edges[b + 1]
+        chunk = y[lo:hi]
+        keep[2 * b + 1] = lo + np.argmin(chunk)
+        keep[2 * b + 2] = lo + np.argmax(chunk)
+
+    return np.unique(keep)
+
+
+def _interp_xyz(md_query: np.ndarray, traj_md: np.ndarray,
+                traj_x: np.ndarray, traj_y: np.ndarray, traj_z: np.ndarray):
+    """
+    Интерполирует три координаты траектории по MD за один бинарный поиск
+
+    Тройной вызов np.interp прогонял бы searchsorted по traj_md трижды;
+    здесь индексы отрезков и веса считаются один раз. Значения вне
+    диапазона MD прижимаются к концам, как это делает np.interp.
+    При наличии numba работает jit-ядро без временных массивов.
+    """
+    if _interp_xyz_kernel is not None:
+        return _interp_xyz_kernel(
+            np.ascontiguousarray(md_query, dtype=np.float64),
+            np.ascontiguousarray(traj_md, dtype=np.float64),
+            np.ascontiguousarray(traj_x, dtype=np.float64),
+            np.ascontiguousarray(traj_y, dtype=np.float64),
+            np.ascontiguousarray(traj_z, dtype=np.float64),
+        )
+
+    idx = np.searchsorted(traj_md, md_query, side='right') - 1
+    idx = np.clip(idx, 0, len(traj_md) - 2)
+    t = (md_query - traj_md[idx]) / (traj_md[idx + 1] - traj_md[idx])
+    t = np.clip(t, 0.0, 1.0)
+
+    x = traj_x[idx] + (traj_x[idx + 1] - traj_x[idx]) * t
+    y = traj_y[idx] + (traj_y[idx + 1] - traj_y[idx]) * t
+    z = traj_z[idx] + (traj_z[idx + 1] - traj_z[idx]) * t
+
+    return x, y, z
+
+
+def _run_length_segments(values: np.ndarray):
+    """
+    Разбивает массив на отрезки подряд идущих одинаковых значений
+
+    Векторная замена поэлементного while-сканирования: границы отрезков
+    находятся одним np.diff по всему массиву.
+
+    Возвращает:
+        starts, ends, seg_values — индекс начала (включительно), конца
+        (исключительно) и значение каждого отрезка
+    """
+    if len(values) == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, values
+
+    change_idx = np.flatnonzero(np.diff(values) != 0) + 1
+    starts = np.concatenate(([0], change_idx))
+    ends = np.concatenate((change_idx, [len(values)]))
+
+    return starts, ends, values[starts]
+
+
+# Кэш построчных словарей well_data: ключ — хэш DataFrame,
+# значение — {название_скважины: словарь строки}
+_WELL_ROWS_CACHE: Dict = {}
+
+
+def _well_rows(well_data: pd.DataFrame) -> Dict[str, Dict]:
+    """
+    Возвращает словарь {скважина: строка well_data} с O(1) доступом
+
+    Точечный поиск строки через булеву маску — это полный проход по
+    колонке плюс сборка промежуточного DataFrame на каждый вызов.
+    Словарь строится один раз на содержимое DataFrame и кэшируется;
+    при дублях имён берётся первая строка, как у маски с iloc[0].
+    """
+    key = _inputs_digest(well_data)
+    rows = _WELL_ROWS_CACHE.get(key)
+    if rows is None:
+        if len(_WELL_ROWS_CACHE) >= _FIGURE_CACHE_MAX:
+            _WELL_ROWS_CACHE.pop(next(iter(_WELL_ROWS_CACHE)))
+        rows = (well_data.drop_duplicates("Well")
+                .set_index("Well", drop=False)
+                .to_dict("index"))
+        _WELL_ROWS_CACHE[key] = rows
+    return rows
+
+
+def _valid_las_samples(las: Dict):
+    """
+    Возвращает (depth_valid, curve_valid, md_min, md_max) по LAS-словарю
+
+    Маска валидных отсчётов (конечные значения, не равные NULL) требует
+    полного скана кривой; LAS-словари живут в session_state между
+    перерисовками, поэтому результат кэшируется в самом словаре под
+    служебным ключом '_valid' и считается один раз, а не на каждый график.
+    Если валидных отсчётов нет — возвращает и кэширует None.
+    """
+    if '_valid' in las:
+        return las['_valid']
+
+    curve = las['curve']
+    # Второе условие дописывается в маску через &= без временного массива
+    valid_mask = np.isfinite(curve)
+    valid_mask &= curve != las.get('null_value', -999.25)
+
+    if not np.any(valid_mask):
+        las['_valid'] = None
+        return None
+
+    depth_valid = las['depth'][valid_mask]
+    curve_valid = curve[valid_mask]
+    las['_valid'] = (depth_valid, curve_valid,
+                     float(depth_valid.min()), float(depth_valid.max()))
+    return las['_valid']
+
+
+def _segment_layer_xyz(traj_md: np.ndarray, traj_x: np.ndarray,
+                       traj_y: np.ndarray, traj_z: np.ndarray,
+                       depth_valid: np.ndarray, curve_valid: np.ndarray) -> Dict:
+    """
+    Интерполирует координаты слоёв и склеивает участки по категориям
+
+    Возвращает {1: (x, y, z, число_участков), 0: (...)} с NaN-разделителями
+    между участками. При наличии numba весь конвейер (поиск по MD, лерп,
+    RLE, раскладка) выполняется одним jit-проходом без временных массивов.
+    """
+    if _segment_xyz_kernel is not None:
+        gx, gy, gz, green_segs, hx, hy, hz, gray_segs = _segment_xyz_kernel(
+            np.ascontiguousarray(traj_md, dtype=np.float64),
+            np.ascontiguousarray(traj_x, dtype=np.float64),
+            np.ascontiguousarray(traj_y, dtype=np.float64),
+            np.ascontiguousarray(traj_z, dtype=np.float64),
+            np.ascontiguousarray(depth_valid, dtype=np.float64),
+            np.ascontiguousarray(curve_valid, dtype=np.float64),
+        )
+        return {1: (gx, gy, gz, green_segs), 0: (hx, hy, hz, gray_segs)}
+
+    x_coords, y_coords, z_coords = _interp_xyz(depth_valid, traj_md,
+                                               traj_x, traj_y, traj_z)
+    starts, ends, seg_values = _run_length_segments(curve_valid)
+
+    result = {}
+    for value in (1, 0):
+        sel = np.flatnonzero(seg_values == value)
+        if sel.size == 0:
+            empty = np.empty(0)
+            result[value] = (empty, empty, empty, 0)
+            continue
+        result[value] = tuple(
+            np.concatenate([np.append(coords[s:e], np.nan)
+                            for s, e in zip(starts[sel], ends[sel])])
+            for coords in (x_coords, y_coords, z_coords)
+        ) + (int(sel.size),)
+
+    return result
+
 
 def create_2d_map(df: pd.DataFrame, trajectories: Dict[str, np.ndarray] = None,
                   show_well_names: bool = True, show_trajectories: bool = True) -> go.Figure:
     """
     Создает 2D карту ВСЕХ скважин с траекториями (вид сверху - проекция XY)
-    
+
+    Результат мемоизируется по хэшу входов — при перерисовке страницы
+    с теми же данными фигура не пересобирается.
+
     Аргументы:
         df: DataFrame с данными скважин (для окраски по доле коллектора)
         trajectories: словарь с траекториями скважин (опционально)
         show_well_names: показывать названия скважин
         show_trajectories: показывать траектории скважин
     """
+    return _memoized_figure(
+        'create_2d_map',
+        lambda: _build_2d_map(df, trajectories, show_well_names, show_trajectories),
+        df, trajectories, show_well_names, show_trajectories
+    )
+
+
+def _build_2d_map(df: pd.DataFrame, trajectories: Dict[str, np.ndarray],
+                  show_well_names: bool, show_trajectories: bool) -> go.Figure:
+    """Собирает фигуру для create_2d_map (без кэша)"""
     fig = go.Figure()
     
     # 1. Сначала рисуем траектории скважин (если есть)
     if show_trajectories and trajectories:
-        colors = px.colors.qualitative.Plotly
-        
+        arrow_x, arrow_y, arrow_dx, arrow_dy, arrow_colors = [], [], [], [], []
+
+        # Линии без легенды и ховера группируем по цвету палитры:
+        # один NaN-склеенный трейс на цвет (их не больше длины палитры)
+        # вместо трейса на скважину
+        color_lines: Dict = {}
+        nan_row = np.array([np.nan])
+
         for i, (well_name, trajectory) in enumerate(trajectories.items()):
             if len(trajectory) < 2:
                 continue
-            
+
             traj_x = trajectory[:, 0]
             traj_y = trajectory[:, 1]
-            
-            color = colors[i % len(colors)]
-            
-            # Рисуем траекторию (тонкая линия)
+
+            color = _PLOTLY_COLORS[i % _NUM_COLORS]
+            xs, ys = color_lines.setdefault(color, ([], []))
+            xs.append(traj_x)
+            xs.append(nan_row)
+            ys.append(traj_y)
+            ys.append(nan_row)
+
+            # Направление в конце траектории — для общего трейса стрелок
+            arrow_x.append(traj_x[-1])
+            arrow_y.append(traj_y[-1])
+            arrow_dx.append(traj_x[-1] - traj_x[-2])
+            arrow_dy.append(traj_y[-1] - traj_y[-2])
+            arrow_colors.append(color)
+
+        for color, (xs, ys) in color_lines.items():
             fig.add_trace(go.Scatter(
-                x=traj_x,
-                y=traj_y,
+                x=np.concatenate(xs),
+                y=np.concatenate(ys),
                 mode='lines',
                 line=dict(color=color, width=2),
-                name=well_name,
+                connectgaps=False,
                 showlegend=False,
                 hoverinfo='skip',
                 opacity=0.6
             ))
-            
-            # Добавляем стрелку направления (от начала к концу)
-            # Берем последние 2 точки для направления
-            if len(traj_x) >= 2:
-                # Вектор направления
-                dx = traj_x[-1] - traj_x[-2]
-                dy = traj_y[-1] - traj_y[-2]
-                
-                # Нормализуем и масштабируем для стрелки
-                length = np.sqrt(dx**2 + dy**2)
-                if length > 0:
-                    dx = dx / length * 50  # Длина стрелки
-                    dy = dy / length * 50
-                    
-                    # Рисуем стрелку в конце траектории
-                    fig.add_annotation(
-                        x=traj_x[-1],
-                        y=traj_y[-1],
-                        ax=traj_x[-1] - dx,
-                        ay=traj_y[-1] - dy,
-                        xref='x',
-                        yref='y',
-                        axref='x',
-                        ayref='y',
-                        showarrow=True,
-                        arrowhead=2,
-                        arrowsize=1,
-                        arrowwidth=2,
-                        arrowcolor=color,
+
+        # Стрелки направления рисуем ОДНИМ трейсом с маркером-стрелкой:
+        # аннотация на каждую скважину — это тяжёлый объект макета,
+        # а углы поворота считаются векторно (hypot + arctan2)
+        if arrow_x:
+            dx = np.asarray(arrow_dx)
+            dy = np.asarray(arrow_dy)
+            has_direction = np.hypot(dx, dy) > 0
+            if np.any(has_direction):
+                # marker.angle отсчитывается по часовой от направления вверх
+                angles = 90.0 - np.degrees(np.arctan2(dy[has_direction],
+                                                      dx[has_direction]))
+                fig.add_trace(go.Scatter(
+                    x=np.asarray(arrow_x)[has_direction],
+                    y=np.asarray(arrow_y)[has_direction],
+                    mode='markers',
+                    marker=dict(
+                        symbol='arrow',
+                        size=14,
+                        angle=angles,
+                        color=np.asarray(arrow_colors, dtype=object)[has_direction],
                         opacity=0.7
-                    )
+                    ),
+                    showlegend=False,
+                    hoverinfo='skip'
+                ))
 
     # 2. Затем рисуем точки ВСЕХ скважин (поверх траекторий)
     # Объединяем данные из df (well_data) и trajectories
-    all_wells_x = []
-    all_wells_y = []
-    all_wells_names = []
-    all_wells_colors = []
-    all_wells_hover = []
-    
-    # Сначала добавляем скважины из df (с данными о коллекторе)
-    for _, row in df.iterrows():
-        all_wells_x.append(row["X"])
-        all_wells_y.append(row["Y"])
-        all_wells_names.append(row["Well"])
-        all_wells_colors.append(row["Доля_коллектора"])
-        all_wells_hover.append(
-            f"{row['Well']}<br>X: {row['X']:.1f}<br>Y: {row['Y']:.1f}<br>"
-            f"H: {row['H']:.2f} м<br>EFF_H: {row['EFF_H']:.2f} м<br>"
-            f"Доля: {row['Доля_коллектора']:.2%}"
-        )
-    
-    # Затем добавляем скважины из траекторий, которых нет в df
+    # Сначала берём скважины из df (с данными о коллекторе):
+    # колонки идут как numpy-массивы напрямую в трейс, без промежуточных
+    # Python-списков и поэлементного боксинга значений
+    all_wells_x = df["X"].to_numpy()
+    all_wells_y = df["Y"].to_numpy()
+    all_wells_names = df["Well"].to_numpy()
+    all_wells_colors = df["Доля_коллектора"].to_numpy()
+
+    # Форматирование ховера выполняет plotly на клиенте: вместо готовых
+    # строк на сервере передаём числа в customdata и общий hovertemplate —
+    # без N форматирований в Python и без повторяющихся подписей в JSON
+    customdata = df[["H", "EFF_H", "Доля_коллектора"]].to_numpy() \
+        if show_well_names else None
+    hover_template = ("%{text}<br>X: %{x:.1f}<br>Y: %{y:.1f}"
+                      "<br>H: %{customdata[0]:.2f} м"
+                      "<br>EFF_H: %{customdata[1]:.2f} м"
+                      "<br>Доля: %{customdata[2]:.2%}<extra></extra>")
+
+    # Затем добавляем скважины из траекторий, которых нет в df:
+    # таких единицы, поэтому копим их в маленькие списки и один раз
+    # дописываем к массивам через np.concatenate
     if trajectories:
         df_wells = set(df["Well"].values)
+        extra_x = []
+        extra_y = []
+        extra_names = []
         for well_name, trajectory in trajectories.items():
             if len(trajectory) == 0:
                 continue
-            
+
             # Если скважины нет в df - добавляем из траектории
             if well_name not in df_wells:
-                x_start = trajectory[0, 0]
-                y_start = trajectory[0, 1]
-                
-                all_wells_x.append(x_start)
-                all_wells_y.append(y_start)
-                all_wells_names.append(well_name)
-                all_wells_colors.append(0.5)  # Средний цвет для скважин без данных
-                all_wells_hover.append(
-                    f"{well_name}<br>X: {x_start:.1f}<br>Y: {y_start:.1f}<br>"
-                    f"Нет данных о мощности и коллекторе"
-                )
-    
-    # Рисуем все точки скважин
-    fig.add_trace(go.Scatter(
+                extra_x.append(trajectory[0, 0])
+                extra_y.append(trajectory[0, 1])
+                extra_names.append(well_name)
+
+        if extra_x:
+            all_wells_x = np.concatenate([all_wells_x, extra_x])
+            all_wells_y = np.concatenate([all_wells_y, extra_y])
+            all_wells_names = np.concatenate([all_wells_names, extra_names])
+            # Средний цвет для скважин без данных
+            all_wells_colors = np.concatenate(
+                [all_wells_colors, np.full(len(extra_x), 0.5)])
+            if show_well_names:
+                # Для скважин без данных — свой шаблон ховера на точку
+                customdata = np.vstack([customdata,
+                                        np.zeros((len(extra_x), 3))])
+                hover_template = np.concatenate([
+                    np.full(len(df), hover_template, dtype=object),
+                    np.full(len(extra_x),
+                            "%{text}<br>X: %{x:.1f}<br>Y: %{y:.1f}<br>"
+                            "Нет данных о мощности и коллекторе<extra></extra>",
+                            dtype=object)
+                ])
+
+    # Рисуем все точки скважин (WebGL, когда точек много)
+    scatter_cls = go.Scattergl if len(all_wells_x) > _WEBGL_THRESHOLD else go.Scatter
+    fig.add_trace(scatter_cls(
         x=all_wells_x,
         y=all_wells_y,
         mode="markers" + ("+text" if show_well_names else ""),
@@ -140,8 +689,9 @@ def create_2d_map(df: pd.DataFrame, trajectories: Dict[str, np.ndarray] = None,
             cmin=0,
             cmax=1
         ),
-        hoverinfo="text",
-        hovertext=all_wells_hover,
+        hoverinfo=None if show_well_names else "skip",
+        customdata=customdata,
+        hovertemplate=hover_template if show_well_names else None,
         name="Скважины",
         showlegend=False
     ))
@@ -174,27 +724,106 @@ def create_3d_trajectories(trajectories: Dict[str, np.ndarray]) -> go.Figure:
     """
     Создает 3D визуализацию траекторий скважин
 
+    Результат мемоизируется по хэшу траекторий.
+
     Аргументы:
         trajectories: словарь с траекториями
 
     Возвращает:
         3D Figure для Plotly
     """
-    fig = go.Figure()
+    return _memoized_figure('create_3d_trajectories',
+                            lambda: _build_3d_trajectories(trajectories),
+                            trajectories)
 
-    colors = px.colors.qualitative.Plotly
 
+def _build_3d_trajectories(trajectories: Dict[str, np.ndarray]) -> go.Figure:
+    """Собирает фигуру для create_3d_trajectories (без кэша)"""
+    fig = go.Figure()
+
+    # Трейсы накапливаем в списке и отдаём Plotly одним add_traces:
+    # каждый отдельный add_trace гоняет валидацию и пересчёт макета
+    traces = []
+
+    # ML-признак считаем одним векторным np.char.startswith на все имена,
+    # а не двумя проверками строки на каждую скважину в цикле
+    names = list(trajectories)
+    ml_mask = (np.char.startswith(np.array(names, dtype=str), "ML_")
+               if names else np.zeros(0, dtype=bool))
+
+    # Цвета всех скважин выбираются заранее одним выражением: обычные
+    # идут по палитре подряд (cumsum по маске — ML-скважины позиций
+    # не занимают), ML фиксированно розовые
+    palette_idx = (np.cumsum(~ml_mask) - 1) % _NUM_COLORS
+    well_colors = np.where(ml_mask, 'hotpink',
+                           np.array(_PLOTLY_COLORS, dtype=object)[palette_idx])
+
+    # Подготовка общая для обоих путей: прореживание длинных траекторий
+    # и float32 для экранных координат
+    prepared = []
     for i, (well_name, trajectory) in enumerate(trajectories.items()):
         if len(trajectory) < 2:
             continue
 
-        # ML скважины отображаются розовым цветом
-        if well_name.startswith("ML_"):
-            color = 'hotpink'
-        else:
-            color = colors[i % len(colors)]
+        # Очень длинные траектории прореживаем по Z с сохранением
+        # экстремумов — геометрия ствола визуально не меняется
+        if len(trajectory) > _DOWNSAMPLE_THRESHOLD:
+            trajectory = trajectory[_minmax_downsample_idx(trajectory[:, 2],
+                                                           _DOWNSAMPLE_THRESHOLD)]
+
+        # float32 достаточно для экранных координат — вдвое меньше байт
+        # в JSON-сериализации и передаче в браузер
+        trajectory = trajectory.astype(np.float32, copy=False)
+
+        prepared.append((well_name, trajectory, well_colors[i], ml_mask[i]))
+
+    if len(prepared) >= _MERGE_WELLS_THRESHOLD:
+        # Много скважин: plotly.js плохо масштабируется по числу трейсов
+        # (каждый — своя GL-программа), поэтому склеиваем все стволы в один
+        # линейный трейс с NaN-разделителями и один трейс маркеров концов.
+        # Ценой становится общая строка легенды вместо построчной.
+        xs, ys, zs, point_colors, point_names = [], [], [], [], []
+        nan_row = np.array([np.nan], dtype=np.float32)
+        end_x, end_y, end_z, end_colors = [], [], [], []
+
+        for well_name, trajectory, color, is_ml in prepared:
+            xs.append(trajectory[:, 0]); xs.append(nan_row)
+            ys.append(trajectory[:, 1]); ys.append(nan_row)
+            zs.append(trajectory[:, 2]); zs.append(nan_row)
+            point_colors.extend([color] * (len(trajectory) + 1))
+            point_names.extend([well_name] * (len(trajectory) + 1))
+
+            end_x.extend((trajectory[0, 0], trajectory[-1, 0]))
+            end_y.extend((trajectory[0, 1], trajectory[-1, 1]))
+            end_z.extend((trajectory[0, 2], trajectory[-1, 2]))
+            if is_ml:
+                end_colors.extend(('hotpink', 'purple'))
+            else:
+                end_colors.extend((color, color))
+
+        traces.append(go.Scatter3d(
+            x=np.concatenate(xs),
+            y=np.concatenate(ys),
+            z=np.concatenate(zs),
+            mode="lines",
+            name=f"Траектории ({len(prepared)} скв.)",
+            line=dict(width=4, color=point_colors),
+            text=point_names,
+            hovertemplate="%{text}<br>Z: %{z:.1f}<extra></extra>"
+        ))
+        traces.append(go.Scatter3d(
+            x=end_x,
+            y=end_y,
+            z=end_z,
+            mode="markers",
+            marker=dict(size=5, color=end_colors),
+            showlegend=False,
+            hoverinfo="skip"
+        ))
+        prepared = []
 
-        fig.add_trace(go.Scatter3d(
+    for well_name, trajectory, color, is_ml in prepared:
+        traces.append(go.Scatter3d(
             x=trajectory[:, 0],
             y=trajectory[:, 1],
             z=trajectory[:, 2],
@@ -210,12 +839,12 @@ def create_3d_trajectories(trajectories: Dict[str, np.ndarray]) -> go.Figure:
 
         # Добавляем маркеры для начала и конца
         # ML скважины: розовый (начало) и фиолетовый (конец)
-        if well_name.startswith("ML_"):
+        if is_ml:
             marker_colors = ['hotpink', 'purple']
         else:
             marker_colors = [color, color]
-        
-        fig.add_trace(go.Scatter3d(
+
+        traces.append(go.Scatter3d(
             x=[trajectory[0, 0], trajectory[-1, 0]],
             y=[trajectory[0, 1], trajectory[-1, 1]],
             z=[trajectory[0, 2], trajectory[-1, 2]],
@@ -228,23 +857,14 @@ def create_3d_trajectories(trajectories: Dict[str, np.ndarray]) -> go.Figure:
             hoverinfo="skip"
         ))
 
+    fig.add_traces(traces)
+
     fig.update_layout(
         title="3D траектории скважин",
-        scene=dict(
-            xaxis_title="X",
-            yaxis_title="Y",
-            zaxis_title="Глубина Z",
-            aspectmode="manual",
-            aspectratio=dict(x=1, y=1, z=0.7)
-        ),
+        scene=_SCENE_3D,
         height=700,
         showlegend=True,
-        legend=dict(
-            yanchor="top",
-            y=0.99,
-            xanchor="left",
-            x=0.01
-        )
+        legend=_LEGEND_TOP_LEFT
     )
 
     return fig
@@ -274,19 +894,30 @@ def create_las_cross_section(las_data: Dict, well_name: str = None) -> go.Figure
     curve = las_data['curve']
     well_name = well_name or las_data.get('well_name', 'Неизвестная скважина')
 
-    # Определяем цвет по значению кривой
-    colors = []
-    for val in curve:
-        if val == 1:
-            colors.append('yellow')  # Эффективный коллектор
-        elif val == 0:
-            colors.append('gray')  # Неэффективный коллектор/неколлектор
-        else:
-            colors.append('lightblue')  # Другие значения
+    # Длинные каротажи прореживаем с сохранением экстремумов:
+    # на экране разницы нет, а объём передаваемых точек ограничен
+    if len(curve) > _DOWNSAMPLE_THRESHOLD:
+        keep = _minmax_downsample_idx(np.asarray(curve), _DOWNSAMPLE_THRESHOLD)
+        depth = np.asarray(depth)[keep]
+        curve = np.asarray(curve)[keep]
+
+    # Определяем цвет по значению кривой через индексы в маленькой палитре:
+    # 1 — эффективный коллектор, 0 — неколлектор, прочее — другие значения.
+    # Промежуточный массив — int8-индексы, объектные строки появляются
+    # только один раз при выборке из палитры
+    curve_arr = np.asarray(curve)
+    palette = np.array(['gray', 'yellow', 'lightblue'], dtype=object)
+    idx = np.select([curve_arr == 0, curve_arr == 1], [np.int8(0), np.int8(1)],
+                    default=np.int8(2))
+    # Plotly принимает ndarray напрямую — без конвертации в список
+    colors = palette[idx]
 
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
+    # Для больших кривых маркеры рисуем через WebGL
+    scatter_cls = go.Scattergl if len(curve) > _WEBGL_THRESHOLD else go.Scatter
+
+    fig.add_trace(scatter_cls(
         x=curve,
         y=depth,
         mode='markers',
@@ -299,23 +930,18 @@ def create_las_cross_section(las_data: Dict, well_name: str = None) -> go.Figure
         hovertemplate='Глубина: %{y:.1f}<br>Значение: %{x}<extra></extra>'
     ))
 
+    # Горизонтальные линии глубины отдаём штатной сетке оси:
+    # ноль дополнительных shape-объектов в макете и в DOM
     fig.update_layout(
         title=f"Разрез скважины: {well_name}",
         xaxis_title="Значение ГИС (1=коллектор, 0=неколлектор)",
         yaxis_title="Глубина",
-        yaxis=dict(autorange="reversed"),
+        yaxis=dict(autorange="reversed", showgrid=True,
+                   gridcolor="lightgray", griddash="dot", nticks=10),
         hovermode="y unified",
         height=600
     )
 
-    # Добавляем горизонтальные линии для глубины
-    for d in np.linspace(depth.min(), depth.max(), 10):
-        fig.add_hline(
-            y=d,
-            line=dict(color="lightgray", width=1, dash="dot"),
-            opacity=0.5
-        )
-
     return fig
 
 
@@ -437,146 +1063,209 @@ def create_3d_reservoir_layers(well_data: pd.DataFrame = None, trajectories: Dic
     layers_added = 0
     wells_processed = 0
     wells_with_layers = 0
-    
+
+    # Трейсы горячих циклов собираем как обычные словари и отдаём фигуре
+    # одним add_traces: без построения go.Scatter3d и повторной валидации
+    # на каждый вызов add_trace
+    traces = []
+
+    # Короткие траектории отсекаем один раз, ML-признак считаем одним
+    # векторным np.char.startswith вместо проверки имени в обоих проходах
+    items = [(name, traj) for name, traj in trajectories.items() if len(traj) >= 2]
+    well_is_ml = dict(zip(
+        (name for name, _ in items),
+        np.char.startswith(np.array([name for name, _ in items], dtype=str), "ML_")
+    ))
+
     # ПЕРВЫЙ ПРОХОД: Рисуем ВСЕ базовые траектории (бледно-синие или розовые для ML)
-    for well_name, trajectory in trajectories.items():
-        if len(trajectory) < 2:
-            continue
-        
-        wells_processed += 1
-        traj_x = trajectory[:, 0]
-        traj_y = trajectory[:, 1]
-        traj_z = trajectory[:, 2]
-        traj_md = trajectory[:, 3]
-        
-        # ML скважины отображаются розовым цветом
-        if well_name.startswith("ML_"):
-            base_color = 'hotpink'
-        else:
-            base_color = 'lightblue'
-        
-        # Рисуем базовую траекторию
-        fig.add_trace(go.Scatter3d(
-            x=traj_x,
-            y=traj_y,
-            z=traj_z,
+    if len(items) >= _MERGE_WELLS_THRESHOLD:
+        # Много скважин: как и в create_3d_trajectories, стволы склеиваются
+        # в один линейный трейс с NaN-разделителями и один трейс маркеров
+        # концов — число трейсов не растёт со списком скважин.
+        # Ценой становится общая строка легенды вместо построчной
+        xs, ys, zs, mds = [], [], [], []
+        point_colors, point_names = [], []
+        nan_row = np.array([np.nan], dtype=np.float32)
+        end_x, end_y, end_z, end_colors = [], [], [], []
+
+        for well_name, trajectory in items:
+            wells_processed += 1
+            plot_traj = trajectory.astype(np.float32, copy=False)
+            traj_x, traj_y, traj_z, traj_md = np.ascontiguousarray(plot_traj.T)
+
+            color = 'hotpink' if well_is_ml[well_name] else 'lightblue'
+            xs.append(traj_x); xs.append(nan_row)
+            ys.append(traj_y); ys.append(nan_row)
+            zs.append(traj_z); zs.append(nan_row)
+            mds.append(traj_md); mds.append(nan_row)
+            point_colors.extend([color] * (len(traj_x) + 1))
+            point_names.extend([well_name] * (len(traj_x) + 1))
+
+            end_x.extend((traj_x[0], traj_x[-1]))
+            end_y.extend((traj_y[0], traj_y[-1]))
+            end_z.extend((traj_z[0], traj_z[-1]))
+            if well_is_ml[well_name]:
+                end_colors.extend(('hotpink', 'purple'))
+            else:
+                end_colors.extend(('blue', 'red'))
+
+        traces.append(dict(
+            type='scatter3d',
+            x=np.concatenate(xs),
+            y=np.concatenate(ys),
+            z=np.concatenate(zs),
             mode="lines",
-            name=well_name,
-            line=dict(
-                width=3,
-                color=base_color
-            ),
-            hoverinfo="name+z",
-            hovertemplate=f"{well_name}<br>Z: %{{z:.1f}}<br>MD: %{{customdata:.1f}}<extra></extra>",
-            customdata=traj_md,
+            name=f"Траектории ({len(items)} скв.)",
+            line=dict(width=3, color=point_colors),
+            text=point_names,
+            customdata=np.concatenate(mds),
+            hovertemplate="%{text}<br>Z: %{z:.1f}<br>MD: %{customdata:.1f}<extra></extra>",
             showlegend=True
         ))
-        
-        # Маркеры начала и конца
-        # ML скважины: розовый круг (начало) и фиолетовый ромб (конец)
-        if well_name.startswith("ML_"):
-            marker_colors = ['hotpink', 'purple']
-            marker_symbols = ['circle', 'diamond']
-        else:
-            marker_colors = ['blue', 'red']
-            marker_symbols = ['circle', 'diamond']
-        
-        fig.add_trace(go.Scatter3d(
-            x=[traj_x[0], traj_x[-1]],
-            y=[traj_y[0], traj_y[-1]],
-            z=[traj_z[0], traj_z[-1]],
+        traces.append(dict(
+            type='scatter3d',
+            x=end_x,
+            y=end_y,
+            z=end_z,
             mode="markers",
             marker=dict(
                 size=6,
-                color=marker_colors,
-                symbol=marker_symbols
+                color=end_colors,
+                symbol=['circle', 'diamond'] * len(items)
             ),
             showlegend=False,
             hoverinfo="skip"
         ))
+    else:
+        for well_name, trajectory in items:
+            wells_processed += 1
+            # float32 достаточно для экранных координат — вдвое меньше байт
+            # при сериализации фигуры (интерполяция ниже идёт по исходному float64).
+            # Транспонирование с копией даёт четыре C-непрерывных массива вместо
+            # страйдовых колонок-видов — сериализатор Plotly не копирует их заново
+            plot_traj = trajectory.astype(np.float32, copy=False)
+            traj_x, traj_y, traj_z, traj_md = np.ascontiguousarray(plot_traj.T)
+
+            # ML скважины отображаются розовым цветом
+            if well_is_ml[well_name]:
+                base_color = 'hotpink'
+                legend_group = 'ml'
+            else:
+                base_color = 'lightblue'
+                legend_group = 'trajectory'
+
+            # Рисуем базовую траекторию
+            traces.append(dict(
+                type='scatter3d',
+                x=traj_x,
+                y=traj_y,
+                z=traj_z,
+                mode="lines",
+                name=well_name,
+                legendgroup=legend_group,
+                line=dict(
+                    width=3,
+                    color=base_color
+                ),
+                hoverinfo="name+z",
+                hovertemplate=f"{well_name}<br>Z: %{{z:.1f}}<br>MD: %{{customdata:.1f}}<extra></extra>",
+                customdata=traj_md,
+                showlegend=True
+            ))
+
+            # Маркеры начала и конца
+            # ML скважины: розовый круг (начало) и фиолетовый ромб (конец)
+            if well_is_ml[well_name]:
+                marker_colors = ['hotpink', 'purple']
+                marker_symbols = ['circle', 'diamond']
+            else:
+                marker_colors = ['blue', 'red']
+                marker_symbols = ['circle', 'diamond']
+
+            traces.append(dict(
+                type='scatter3d',
+                x=[traj_x[0], traj_x[-1]],
+                y=[traj_y[0], traj_y[-1]],
+                z=[traj_z[0], traj_z[-1]],
+                mode="markers",
+                marker=dict(
+                    size=6,
+                    color=marker_colors,
+                    symbol=marker_symbols
+                ),
+                showlegend=False,
+                hoverinfo="skip"
+            ))
     
-    # ВТОРОЙ ПРОХОД: Добавляем слои коллекторов ПОВЕРХ траекторий
+    # ВТОРОЙ ПРОХОД: Добавляем слои коллекторов ПОВЕРХ траекторий.
+    # Сегменты копятся по категориям через все скважины и уходят в фигуру
+    # РОВНО двумя трейсами (зелёный и серый) с NaN-разделителями:
+    # число трейсов не зависит ни от числа прослоев, ни от числа скважин
+    layer_acc = {
+        1: {'x': [], 'y': [], 'z': [], 'text': []},
+        0: {'x': [], 'y': [], 'z': [], 'text': []},
+    }
     if show_well_logs and las_data:
-        for well_name, trajectory in trajectories.items():
-            if len(trajectory) < 2:
-                continue
-            
+        for well_name, trajectory in items:
             # Проверяем наличие LAS данных
             if well_name not in las_data:
                 continue
             
-            traj_x = trajectory[:, 0]
-            traj_y = trajectory[:, 1]
-            traj_z = trajectory[:, 2]
-            traj_md = trajectory[:, 3]
-            
-            las = las_data[well_name]
-            depth = las['depth']  # MD
-            curve = las['curve']
-            null_value = las.get('null_value', -999.25)
-            
-            # Фильтруем валидные данные
-            valid_mask = (curve != null_value) & (~np.isnan(curve))
-            if not np.any(valid_mask):
+            # Непрерывные колонки: searchsorted и лерп по ним быстрее,
+            # чем по страйдовым видам исходной (N,4)-матрицы
+            traj_x, traj_y, traj_z, traj_md = np.ascontiguousarray(trajectory.T)
+
+            # Валидные отсчёты (и их границы MD) берём из кэша LAS-словаря
+            valid = _valid_las_samples(las_data[well_name])
+            if valid is None:
                 continue
-            
-            depth_valid = depth[valid_mask]
-            curve_valid = curve[valid_mask]
-            
+            depth_valid, curve_valid, las_md_min, las_md_max = valid
+
             # Проверяем диапазоны MD
-            las_md_min, las_md_max = depth_valid.min(), depth_valid.max()
             traj_md_min, traj_md_max = traj_md.min(), traj_md.max()
             
             # Если диапазоны не пересекаются - пропускаем
             if las_md_max < traj_md_min or las_md_min > traj_md_max:
                 continue
             
-            # Интерполируем координаты по MD
-            x_coords = np.interp(depth_valid, traj_md, traj_x)
-            y_coords = np.interp(depth_valid, traj_md, traj_y)
-            z_coords = np.interp(depth_valid, traj_md, traj_z)
-            
             wells_with_layers += 1
-            
-            # Рисуем сегменты слоев коллекторов ПОВЕРХ базовой траектории
-            i = 0
-            while i < len(curve_valid):
-                current_value = curve_valid[i]
-                start_idx = i
-                
-                # Находим конец текущего сегмента
-                while i < len(curve_valid) and curve_valid[i] == current_value:
-                    i += 1
-                end_idx = i - 1
-                
-                # Определяем цвет и ширину (толще базовой траектории)
-                if current_value == 1:  # Коллектор
-                    color = 'green'
-                    width = 8  # Толще базовой линии
-                    name = 'Коллектор'
-                elif current_value == 0:  # Неколлектор
-                    color = 'gray'
-                    width = 6  # Толще базовой линии
-                    name = 'Неколлектор'
-                else:
+
+            # Интерполяция координат, RLE и NaN-склейка участков идут одним
+            # конвейером (jit-проход при наличии numba); имя скважины
+            # сохраняем попоточечно для ховера, координаты — во float32
+            segments = _segment_layer_xyz(traj_md, traj_x, traj_y, traj_z,
+                                          depth_valid, curve_valid)
+            for value, acc in layer_acc.items():
+                seg_x, seg_y, seg_z, n_segs = segments[value]
+                if n_segs == 0:
                     continue
-                
-                # Рисуем сегмент слоя ПОВЕРХ траектории
-                segment_x = x_coords[start_idx:end_idx+1]
-                segment_y = y_coords[start_idx:end_idx+1]
-                segment_z = z_coords[start_idx:end_idx+1]
-                
-                fig.add_trace(go.Scatter3d(
-                    x=segment_x,
-                    y=segment_y,
-                    z=segment_z,
-                    mode='lines',
-                    line=dict(color=color, width=width),
-                    showlegend=False,  # Не показываем в легенде каждый сегмент
-                    hovertemplate=f"{well_name}<br>{name}<br>Z: %{{z:.1f}}<extra></extra>"
-                ))
-                layers_added += 1
-    
+                acc['x'].append(seg_x.astype(np.float32, copy=False))
+                acc['y'].append(seg_y.astype(np.float32, copy=False))
+                acc['z'].append(seg_z.astype(np.float32, copy=False))
+                acc['text'].extend([well_name] * len(seg_x))
+                layers_added += n_segs
+
+    for value, color, width, name in ((1, 'green', 8, 'Коллектор (1)'),
+                                      (0, 'gray', 6, 'Неколлектор (0)')):
+        acc = layer_acc[value]
+        if not acc['x']:
+            continue
+        traces.append(dict(
+            type='scatter3d',
+            x=np.concatenate(acc['x']),
+            y=np.concatenate(acc['y']),
+            z=np.concatenate(acc['z']),
+            mode='lines',
+            name=name,
+            line=dict(color=color, width=width),
+            connectgaps=False,
+            showlegend=True,
+            text=acc['text'],
+            hovertemplate=f"%{{text}}<br>{name}<br>Z: %{{z:.1f}}<extra></extra>"
+        ))
+
+    fig.add_traces(traces)
+
     # НОВОЕ: Добавляем интерполированные поверхности между скважинами
     if show_interpolated_surfaces and las_data and well_data is not None:
         try:
@@ -592,27 +1281,19 @@ def create_3d_reservoir_layers(well_data: pd.DataFrame = None, trajectories: Dic
                 if well_name not in las_data or len(trajectory) < 2:
                     continue
                 
-                las = las_data[well_name]
-                depth = las['depth']
-                curve = las['curve']
-                null_value = las.get('null_value', -999.25)
-                
-                valid_mask = (curve != null_value) & (~np.isnan(curve))
-                if not np.any(valid_mask):
+                valid = _valid_las_samples(las_data[well_name])
+                if valid is None:
                     continue
+                depth_valid, curve_valid = valid[0], valid[1]
+
+
+                # Один транспонированный срез даёт четыре непрерывных
+                # колонки вместо четырёх страйдовых видов
+                traj_x, traj_y, traj_z, traj_md = np.ascontiguousarray(trajectory.T)
                 
-                depth_valid = depth[valid_mask]
-                curve_valid = curve[valid_mask]
-                
-                traj_x = trajectory[:, 0]
-                traj_y = trajectory[:, 1]
-                traj_z = trajectory[:, 2]
-                traj_md = trajectory[:, 3]
-                
-                # Интерполируем координаты
-                x_coords = np.interp(depth_valid, traj_md, traj_x)
-                y_coords = np.interp(depth_valid, traj_md, traj_y)
-                z_coords = np.interp(depth_valid, traj_md, traj_z)
+                # Интерполируем координаты (один поиск на три координаты)
+                x_coords, y_coords, z_coords = _interp_xyz(depth_valid, traj_md,
+                                                           traj_x, traj_y, traj_z)
                 
                 # Разделяем на коллекторы и неколлекторы
                 for i in range(len(curve_valid)):
@@ -685,41 +1366,9 @@ def create_3d_reservoir_layers(well_data: pd.DataFrame = None, trajectories: Dic
             import traceback
             traceback.print_exc()
     
-    # Добавляем легенду для типов коллекторов
-    if layers_added > 0:
-        fig.add_trace(go.Scatter3d(
-            x=[None], y=[None], z=[None],
-            mode='lines',
-            line=dict(color='green', width=8),
-            name='Коллектор (1)',
-            showlegend=True
-        ))
-        
-        fig.add_trace(go.Scatter3d(
-            x=[None], y=[None], z=[None],
-            mode='lines',
-            line=dict(color='gray', width=6),
-            name='Неколлектор (0)',
-            showlegend=True
-        ))
-    
-    # Добавляем легенду для базовых траекторий
-    fig.add_trace(go.Scatter3d(
-        x=[None], y=[None], z=[None],
-        mode='lines',
-        line=dict(color='lightblue', width=3),
-        name='Траектория скважины',
-        showlegend=True
-    ))
-    
-    fig.add_trace(go.Scatter3d(
-        x=[None], y=[None], z=[None],
-        mode='lines',
-        line=dict(color='hotpink', width=3),
-        name='ML скважина',
-        showlegend=True
-    ))
-    
+    # Легенда собирается из самих трейсов (legendgroup + первый видимый),
+    # отдельные невидимые трейсы-пустышки не добавляем
+
     # Формируем заголовок
     title_text = "3D визуализация пластов-коллекторов"
     if layers_added > 0:
@@ -734,30 +1383,11 @@ def create_3d_reservoir_layers(well_data: pd.DataFrame = None, trajectories: Dic
             'x': 0.5,
             'xanchor': 'center'
         },
-        scene=dict(
-            xaxis_title="X (м)",
-            yaxis_title="Y (м)",
-            zaxis_title="Глубина Z (м)",
-            aspectmode="manual",
-            aspectratio=dict(x=1, y=1, z=0.7),
-            camera=dict(
-                eye=dict(x=1.5, y=1.5, z=1.2),
-                center=dict(x=0, y=0, z=-0.1)
-            ),
-            xaxis=dict(backgroundcolor="rgb(240, 240, 240)", gridcolor="white"),
-            yaxis=dict(backgroundcolor="rgb(240, 240, 240)", gridcolor="white"),
-            zaxis=dict(backgroundcolor="rgb(240, 240, 240)", gridcolor="white")
-        ),
+        scene=_SCENE_RESERVOIR,
         height=800,
         showlegend=True,
-        legend=dict(
-            yanchor="top",
-            y=0.99,
-            xanchor="left",
-            x=0.01,
-            bgcolor="rgba(255, 255, 255, 0.8)"
-        ),
-        margin=dict(l=0, r=0, t=40, b=0)
+        legend=_LEGEND_TOP_LEFT_BG,
+        margin=_MARGIN_TIGHT
     )
     
     return fig
@@ -779,17 +1409,16 @@ def create_2d_well_projection(well_data: pd.DataFrame, las_data: Dict[str, Dict]
     """
     fig = go.Figure()
     
-    # Получаем данные выбранной скважины
-    well_row = well_data[well_data["Well"] == selected_well]
-    if well_row.empty:
+    # Получаем данные выбранной скважины: O(1) поиск в кэшированном
+    # словаре строк вместо булевой маски по всей колонке
+    well_row = _well_rows(well_data).get(selected_well)
+    if well_row is None:
         fig.add_annotation(
             text=f"Скважина {selected_well} не найдена",
             xref="paper", yref="paper",
             x=0.5, y=0.5, showarrow=False
         )
         return fig
-    
-    well_row = well_row.iloc[0]
     z_top = well_row["Z"]
     z_bottom = well_row["Z"] - well_row["H"]
     h_total = well_row["H"]
@@ -804,26 +1433,17 @@ def create_2d_well_projection(well_data: pd.DataFrame, las_data: Dict[str, Dict]
         )
         return fig
     
-    las = las_data[selected_well]
-    depth = las['depth']  # MD - measured depth (длина трубы)
-    curve = las['curve']
-    null_value = las.get('null_value', -999.25)
-    
-    # Фильтруем валидные данные
-    valid_mask = (curve != null_value) & (~np.isnan(curve))
-    if not np.any(valid_mask):
+    # Валидные отсчёты (MD) и их границы берём из кэша LAS-словаря
+    valid = _valid_las_samples(las_data[selected_well])
+    if valid is None:
         fig.add_annotation(
             text=f"Нет валидных данных для {selected_well}",
             xref="paper", yref="paper",
             x=0.5, y=0.5, showarrow=False
         )
         return fig
-    
-    depth_valid = depth[valid_mask]  # MD values
-    curve_valid = curve[valid_mask]
-    
-    # Нормализуем глубину к диапазону скважины
-    depth_min, depth_max = depth_valid.min(), depth_valid.max()
+
+    depth_valid, curve_valid, depth_min, depth_max = valid
     if depth_max - depth_min < 0.1:
         fig.add_annotation(
             text=f"Недостаточно данных для {selected_well}",
@@ -840,7 +1460,8 @@ def create_2d_well_projection(well_data: pd.DataFrame, las_data: Dict[str, Dict]
         traj_z = trajectory[:, 2]   # Z из траектории
         
         # КРИТИЧНО: Проверяем соответствие диапазонов MD
-        las_md_min, las_md_max = depth_valid.min(), depth_valid.max()
+        # (границы глубин уже вычислены выше — не повторяем редукции)
+        las_md_min, las_md_max = depth_min, depth_max
         traj_md_min, traj_md_max = traj_md.min(), traj_md.max()
         
         # Проверка на выход за пределы траектории
@@ -857,8 +1478,12 @@ def create_2d_well_projection(well_data: pd.DataFrame, las_data: Dict[str, Dict]
             # Интерполируем Z координаты по MD из траектории
             z_coords = np.interp(depth_valid, traj_md, traj_z)
         
-        # Проверка: если скважина вертикальная (малая вариация Z)
-        if np.std(z_coords) < 0.1:
+        # Проверка: если скважина вертикальная (малая вариация Z).
+        # Сравнение концов за O(1) сразу отсекает наклонные стволы;
+        # полная редукция ptp выполняется только когда концы почти на
+        # одной глубине (ствол мог уйти вниз и вернуться)
+        if (abs(float(z_coords[-1]) - float(z_coords[0])) < 0.3
+                and np.ptp(z_coords) < 0.3):
             # Вертикальная скважина - используем линейное приближение
             z_coords = z_top - (depth_valid - las_md_min) * (h_total / (las_md_max - las_md_min))
     else:
@@ -877,49 +1502,53 @@ def create_2d_well_projection(well_data: pd.DataFrame, las_data: Dict[str, Dict]
     ))
     
     # 2. Рисуем слои коллекторов и неколлекторов
-    # Группируем последовательные значения
-    i = 0
-    while i < len(curve_valid):
-        current_value = curve_valid[i]
-        start_idx = i
-        
-        # Находим конец текущего слоя
-        while i < len(curve_valid) and curve_valid[i] == current_value:
-            i += 1
-        end_idx = i - 1
-        
-        if current_value == 1:  # Коллектор
-            color = 'green'
-            name = 'Коллектор'
-            width = 40
-        elif current_value == 0:  # Неколлектор
-            color = 'gray'
-            name = 'Неколлектор'
-            width = 40
-        else:
+    # Последовательные одинаковые значения группируем векторным RLE,
+    # все прямоугольники одного типа кладём в ОДИН заполненный трейс:
+    # NaN-разделитель закрывает полигон, а число трейсов не зависит
+    # от количества прослоев
+    starts, ends, seg_values = _run_length_segments(curve_valid)
+    width = 40
+    # Шаблон X-координат прямоугольника один для обеих категорий
+    rect_x = np.array([-width/2, width/2, width/2, -width/2, -width/2, np.nan])
+    for value, color, name in ((1, 'green', 'Коллектор (1)'),
+                               (0, 'gray', 'Неколлектор (0)')):
+        sel = np.flatnonzero(seg_values == value)
+        if sel.size == 0:
             continue
-        
-        # Рисуем прямоугольник слоя
-        z_start = z_coords[start_idx]
-        z_end = z_coords[end_idx]
-        
+
+        # Кровля и подошва каждого слоя (ends исключительны)
+        z_start = z_coords[starts[sel]]
+        z_end = z_coords[ends[sel] - 1]
+
+        xs = np.tile(rect_x, sel.size)
+        ys = np.empty(6 * sel.size)
+        ys[0::6] = z_start
+        ys[1::6] = z_start
+        ys[2::6] = z_end
+        ys[3::6] = z_end
+        ys[4::6] = z_start
+        ys[5::6] = np.nan
+
         fig.add_trace(go.Scatter(
-            x=[-width/2, width/2, width/2, -width/2, -width/2],
-            y=[z_start, z_start, z_end, z_end, z_start],
+            x=xs,
+            y=ys,
             fill='toself',
             fillcolor=color,
             line=dict(color=color, width=1),
             mode='lines',
             name=name,
-            showlegend=False,
+            showlegend=True,  # Сам трейс и есть легендный пункт категории
             opacity=0.7,
             hovertemplate=f'{name}<br>Глубина: %{{y:.1f}}<extra></extra>'
         ))
     
     # 3. Добавляем каротажную кривую (красная линия)
-    # Масштабируем кривую для отображения
-    curve_normalized = (curve_valid - curve_valid.min()) / (curve_valid.max() - curve_valid.min() + 0.001)
-    curve_scaled = curve_normalized * 30 - 15  # Центрируем относительно ствола
+    # Масштабируем кривую для отображения: нормировка и центрирование
+    # слиты в одно выражение — один временный массив вместо двух,
+    # min/max считаются по разу
+    curve_lo = curve_valid.min()
+    curve_span = 30.0 / (curve_valid.max() - curve_lo + 0.001)
+    curve_scaled = (curve_valid - curve_lo) * curve_span - 15.0  # центр у ствола
     
     fig.add_trace(go.Scatter(
         x=curve_scaled,
@@ -943,23 +1572,9 @@ def create_2d_well_projection(well_data: pd.DataFrame, las_data: Dict[str, Dict]
         showlegend=True
     ))
     
-    # 5. Добавляем легенду для коллектора и неколлектора
-    fig.add_trace(go.Scatter(
-        x=[None], y=[None],
-        mode='markers',
-        marker=dict(size=15, color='green', symbol='square'),
-        name='Коллектор (1)',
-        showlegend=True
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=[None], y=[None],
-        mode='markers',
-        marker=dict(size=15, color='gray', symbol='square'),
-        name='Неколлектор (0)',
-        showlegend=True
-    ))
-    
+    # Легенда для коллектора и неколлектора идёт от самих слоёв-трейсов,
+    # трейсы-пустышки не добавляем
+
     # Настройки макета
     fig.update_layout(
         title=f"2D проекция скважины {selected_well}",
@@ -999,172 +1614,170 @@ def create_2d_trajectory_projections(well_name: str, trajectories: Dict[str, np.
                                       las_data: Dict[str, Dict] = None) -> Dict[str, go.Figure]:
     """
     Создает три 2D проекции траектории скважины (XY, XZ, YZ) с окраской по типу коллектора
-    
+
+    Проекции собраны в одну фигуру make_subplots — один проход раскладки
+    и один WebGL-контекст вместо трёх отдельных фигур.
+
     Аргументы:
         well_name: название скважины
         trajectories: словарь с траекториями скважин
         las_data: словарь с LAS-данными (для окраски коллекторов)
-    
+
     Возвращает:
-        Словарь с тремя Figure: {'XY': fig_xy, 'XZ': fig_xz, 'YZ': fig_yz}
+        Словарь {'combined': fig} с общей фигурой трёх проекций
     """
     if well_name not in trajectories:
         return {}
     
     trajectory = trajectories[well_name]
-    traj_x = trajectory[:, 0]
-    traj_y = trajectory[:, 1]
-    traj_z = trajectory[:, 2]
-    traj_md = trajectory[:, 3]
-    
-    # Подготавливаем данные о коллекторах, если есть
-    has_collector_data = False
-    x_coords, y_coords, z_coords, curve_valid = None, None, None, None
-    
+    # Один транспонированный срез даёт четыре непрерывных колонки
+    # вместо четырёх страйдовых видов
+    traj_x, traj_y, traj_z, traj_md = np.ascontiguousarray(trajectory.T)
+    
+    # NaN-склейку сегментов считаем ОДИН раз на скважину через общий
+    # конвейер _segment_layer_xyz: при наличии numba поиск по MD, лерп,
+    # RLE и раскладка с NaN-разделителями выполняются одним jit-проходом,
+    # а три проекции только выбирают свою пару осей из шести массивов.
+    # float32 хватает для пиксельной точности рендера, а полезная нагрузка
+    # JSON и загрузка вершин в WebGL вдвое меньше
+    segment_axes = {}
     if las_data and well_name in las_data:
-        las = las_data[well_name]
-        depth = las['depth']
-        curve = las['curve']
-        null_value = las.get('null_value', -999.25)
-        
-        valid_mask = (curve != null_value) & (~np.isnan(curve))
-        if np.any(valid_mask):
-            depth_valid = depth[valid_mask]
-            curve_valid = curve[valid_mask]
-            
-            # Интерполируем координаты
-            x_coords = np.interp(depth_valid, traj_md, traj_x)
-            y_coords = np.interp(depth_valid, traj_md, traj_y)
-            z_coords = np.interp(depth_valid, traj_md, traj_z)
-            has_collector_data = True
-    
-    # Функция для создания сегментов с окраской
-    def add_colored_segments(fig, x_data, y_data, x_label, y_label):
-        """Добавляет базовую траекторию и цветные сегменты коллекторов"""
-        # Базовая траектория (бледно-синяя)
-        fig.add_trace(go.Scatter(
+        valid = _valid_las_samples(las_data[well_name])
+        if valid is not None:
+            depth_valid, curve_valid = valid[0], valid[1]
+            segments = _segment_layer_xyz(traj_md, traj_x, traj_y, traj_z,
+                                          depth_valid, curve_valid)
+            for value, line, name in _SEGMENT_STYLES:
+                seg_x, seg_y, seg_z, n_segs = segments[value]
+                if n_segs == 0:
+                    continue
+                segment_axes[value] = (
+                    {'X': seg_x.astype(np.float32),
+                     'Y': seg_y.astype(np.float32),
+                     'Z': seg_z.astype(np.float32)},
+                    line, name
+                )
+
+    # Собирает трейсы одной проекции (словари — без валидации go.Scatter)
+    def projection_traces(x_data, y_data, x_label, y_label, show_legend):
+        """Базовая траектория, маркеры концов и цветные сегменты коллекторов"""
+        traces = []
+
+        # В браузер координаты уходят в float32 — вдвое меньший payload
+        x_data = np.asarray(x_data, dtype=np.float32)
+        y_data = np.asarray(y_data, dtype=np.float32)
+
+        # Базовая траектория (бледно-синяя); на плотных траекториях
+        # переключаемся на WebGL-рендер
+        traces.append(dict(
+            type='scattergl' if len(x_data) > _WEBGL_THRESHOLD else 'scatter',
             x=x_data,
             y=y_data,
             mode='lines',
-            line=dict(color='lightblue', width=2),
+            line=_BASE_LINE,
             name='Траектория',
+            legendgroup='trajectory',
+            showlegend=show_legend,
             hovertemplate=f'{x_label}: %{{x:.1f}}<br>{y_label}: %{{y:.1f}}<extra></extra>'
         ))
-        
+
         # Маркеры начала и конца
-        fig.add_trace(go.Scatter(
+        traces.append(dict(
+            type='scatter',
             x=[x_data[0], x_data[-1]],
             y=[y_data[0], y_data[-1]],
             mode='markers',
-            marker=dict(size=10, color=['blue', 'red'], symbol=['circle', 'diamond']),
+            marker=_START_END_MARKER,
             name='Начало/Конец',
-            showlegend=True,
+            legendgroup='endpoints',
+            showlegend=show_legend,
             hoverinfo='skip'
         ))
-        
-        # Добавляем цветные сегменты коллекторов, если есть данные
-        if has_collector_data:
-            # Определяем какие координаты использовать
-            if x_label == 'X' and y_label == 'Y':
-                seg_x, seg_y = x_coords, y_coords
-            elif x_label == 'X' and y_label == 'Z':
-                seg_x, seg_y = x_coords, z_coords
-            else:  # Y, Z
-                seg_x, seg_y = y_coords, z_coords
-            
-            i = 0
-            while i < len(curve_valid):
-                current_value = curve_valid[i]
-                start_idx = i
-                
-                while i < len(curve_valid) and curve_valid[i] == current_value:
-                    i += 1
-                end_idx = i - 1
-                
-                if current_value == 1:
-                    color, width, name = 'green', 4, 'Коллектор'
-                elif current_value == 0:
-                    color, width, name = 'gray', 3, 'Неколлектор'
-                else:
-                    continue
-                
-                fig.add_trace(go.Scatter(
-                    x=seg_x[start_idx:end_idx+1],
-                    y=seg_y[start_idx:end_idx+1],
-                    mode='lines',
-                    line=dict(color=color, width=width),
-                    showlegend=False,
-                    hovertemplate=f'{name}<br>{x_label}: %{{x:.1f}}<br>{y_label}: %{{y:.1f}}<extra></extra>'
-                ))
-    
-    # Создаем три проекции
-    figures = {}
-    
-    # 1. Проекция XY (вид сверху)
-    fig_xy = go.Figure()
-    add_colored_segments(fig_xy, traj_x, traj_y, 'X', 'Y')
-    fig_xy.update_layout(
-        title=f'Проекция XY (вид сверху) - {well_name}',
-        xaxis_title='X (м)',
-        yaxis_title='Y (м)',
-        height=500,
-        hovermode='closest',
-        template='plotly_white',
-        showlegend=True,
-        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.8)')
-    )
-    fig_xy.update_xaxes(scaleanchor="y", scaleratio=1)
-    figures['XY'] = fig_xy
-    
-    # 2. Проекция XZ (вид сбоку)
-    fig_xz = go.Figure()
-    add_colored_segments(fig_xz, traj_x, traj_z, 'X', 'Z')
-    fig_xz.update_layout(
-        title=f'Проекция XZ (вид сбоку) - {well_name}',
-        xaxis_title='X (м)',
-        yaxis_title='Глубина Z (м)',
-        height=500,
-        hovermode='closest',
-        template='plotly_white',
-        showlegend=True,
-        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.8)')
-    )
-    figures['XZ'] = fig_xz
-    
-    # 3. Проекция YZ (вид сбоку)
-    fig_yz = go.Figure()
-    add_colored_segments(fig_yz, traj_y, traj_z, 'Y', 'Z')
-    fig_yz.update_layout(
-        title=f'Проекция YZ (вид сбоку) - {well_name}',
-        xaxis_title='Y (м)',
-        yaxis_title='Глубина Z (м)',
-        height=500,
-        hovermode='closest',
-        template='plotly_white',
-        showlegend=True,
-        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.8)')
-    )
-    figures['YZ'] = fig_yz
-    
-    # Добавляем легенду для коллекторов во все графики
-    if has_collector_data:
-        for fig in figures.values():
-            fig.add_trace(go.Scatter(
-                x=[None], y=[None],
-                mode='lines',
-                line=dict(color='green', width=4),
-                name='Коллектор (1)',
-                showlegend=True
-            ))
-            fig.add_trace(go.Scatter(
-                x=[None], y=[None],
+
+        # Добавляем цветные сегменты коллекторов: участки одной категории
+        # склеены в ОДИН трейс NaN-разделителями — он же несёт запись
+        # в легенде, поэтому трейсы-пустышки x=[None] больше не нужны.
+        # Ховер на плотных сегментах выключен: координаты и так показывает
+        # базовая траектория под ними, а браузер не тратит кадры на
+        # hit-testing тысяч точек. Массивы уже посчитаны на уровне
+        # скважины, здесь только выбор осей
+        for axes, line, name in segment_axes.values():
+            traces.append(dict(
+                type='scattergl' if axes[x_label].size > _WEBGL_THRESHOLD else 'scatter',
+                x=axes[x_label],
+                y=axes[y_label],
                 mode='lines',
-                line=dict(color='gray', width=3),
-                name='Неколлектор (0)',
-                showlegend=True
+                line=line,
+                connectgaps=False,
+                name=name,
+                legendgroup=name,
+                showlegend=show_legend,
+                hoverinfo='skip'
             ))
-    
-    return figures
+
+        return traces
+
+    # Все три проекции живут в ОДНОЙ фигуре make_subplots: один проход
+    # раскладки, одна сериализация и один WebGL-контекст в браузере
+    # (на отдельные фигуры браузер заводит по контексту при лимите 8-16).
+    # Легенда общая — записи дублирующих трейсов скрыты через legendgroup
+    fig = make_subplots(
+        rows=1, cols=3,
+        subplot_titles=('XY (вид сверху)', 'XZ (вид сбоку)', 'YZ (вид сбоку)'),
+        horizontal_spacing=0.07
+    )
+
+    projections = (
+        (1, traj_x, traj_y, 'X', 'Y'),
+        (2, traj_x, traj_z, 'X', 'Z'),
+        (3, traj_y, traj_z, 'Y', 'Z'),
+    )
+    for col, x_data, y_data, x_label, y_label in projections:
+        traces = projection_traces(x_data, y_data, x_label, y_label,
+                                   show_legend=(col == 1))
+        fig.add_traces(traces, rows=[1] * len(traces), cols=[col] * len(traces))
+
+    fig.update_layout(dict(_PROJECTION_LAYOUT_BASE,
+                           title=f'Проекции траектории - {well_name}'))
+    fig.update_xaxes(title_text='X (м)', row=1, col=1)
+    fig.update_yaxes(title_text='Y (м)', row=1, col=1)
+    fig.update_xaxes(title_text='X (м)', row=1, col=2)
+    fig.update_yaxes(title_text='Глубина Z (м)', row=1, col=2)
+    fig.update_xaxes(title_text='Y (м)', row=1, col=3)
+    fig.update_yaxes(title_text='Глубина Z (м)', row=1, col=3)
+    # Вид сверху сохраняет масштаб 1:1
+    fig.update_xaxes(scaleanchor='y', scaleratio=1, row=1, col=1)
+
+    return {'combined': fig}
+
+
+def _predicted_ratios(predicted_wells: Dict[str, Dict]):
+    """
+    Имена, координаты устьев и предсказанные доли коллектора пакетом
+
+    Вместо Python-цикла с np.mean на каждую скважину предсказания
+    складываются в одну матрицу (длины у ML-заглушки совпадают) и доля
+    считается одной редукцией по строкам; для разнодлинных массивов —
+    запасной поскважинный путь.
+
+    Возвращает:
+        names, xs, ys, ratios — списки/массивы в порядке словаря
+    """
+    names = list(predicted_wells)
+    n = len(names)
+    # float32 хватает для координат и долей на карте, payload вдвое меньше
+    xs = np.fromiter((predicted_wells[name]['x'] for name in names),
+                     np.float32, n)
+    ys = np.fromiter((predicted_wells[name]['y'] for name in names),
+                     np.float32, n)
+
+    preds = [np.asarray(predicted_wells[name]['prediction']) for name in names]
+    if n and len({p.shape for p in preds}) == 1:
+        ratios = (np.stack(preds) > 0.5).mean(axis=1, dtype=np.float32)
+    else:
+        ratios = np.array([np.mean(p > 0.5) for p in preds], dtype=np.float32)
+
+    return names, xs, ys, ratios
 
 
 def create_ml_predictions_map(existing_wells: pd.DataFrame,
@@ -1173,6 +1786,9 @@ def create_ml_predictions_map(existing_wells: pd.DataFrame,
     """
     Создает карту с существующими скважинами и ML предсказаниями
 
+    Результат мемоизируется по хэшу входов — при перерисовке с теми же
+    скважинами и предсказаниями фигура не пересобирается.
+
     Args:
         existing_wells: DataFrame с существующими скважинами
         predicted_wells: Словарь предсказаний от ML модели
@@ -1181,8 +1797,21 @@ def create_ml_predictions_map(existing_wells: pd.DataFrame,
     Returns:
         Plotly Figure с картой
     """
+    return _memoized_figure(
+        'create_ml_predictions_map',
+        lambda: _build_ml_predictions_map(existing_wells, predicted_wells,
+                                          show_existing),
+        existing_wells, predicted_wells, show_existing
+    )
 
-    fig = go.Figure()
+
+def _build_ml_predictions_map(existing_wells: pd.DataFrame,
+                              predicted_wells: Dict[str, Dict],
+                              show_existing: bool) -> go.Figure:
+    """Собирает фигуру для create_ml_predictions_map (без кэша)"""
+    # Трейсы собираем обычными словарями и отдаём фигуре одним вызовом —
+    # без поаргументной валидации конструкторов go.Scatter
+    traces = []
 
     # 1. Добавляем существующие скважины
     if show_existing and not existing_wells.empty:
@@ -1193,7 +1822,9 @@ def create_ml_predictions_map(existing_wells: pd.DataFrame,
             # Создаем цветовую шкалу по доле коллектора
             collector_ratios = wells_with_coords['Доля_коллектора'].fillna(0)
 
-            fig.add_trace(go.Scatter(
+            traces.append(dict(
+                type=('scattergl' if len(wells_with_coords) > _WEBGL_THRESHOLD
+                      else 'scatter'),
                 x=wells_with_coords['X'],
                 y=wells_with_coords['Y'],
                 mode='markers',
@@ -1220,23 +1851,13 @@ def create_ml_predictions_map(existing_wells: pd.DataFrame,
 
     # 2. Добавляем предсказанные скважины
     if predicted_wells:
-        pred_x = []
-        pred_y = []
-        pred_names = []
-        pred_ratios = []
-
-        for well_name, pred_data in predicted_wells.items():
-            pred_x.append(pred_data['x'])
-            pred_y.append(pred_data['y'])
-            pred_names.append(well_name)
-
-            # Вычисляем предсказанную долю коллектора
-            predictions = np.array(pred_data['prediction'])
-            collector_ratio = np.mean(predictions > 0.5)  # Порог 0.5
-            pred_ratios.append(collector_ratio)
-
-        if pred_x:
-            fig.add_trace(go.Scatter(
+        # Доли коллектора (порог 0.5) считаются одной матричной редукцией
+        pred_names, pred_x, pred_y, pred_ratios = _predicted_ratios(predicted_wells)
+
+        if pred_names:
+            traces.append(dict(
+                type=('scattergl' if len(pred_names) > _WEBGL_THRESHOLD
+                      else 'scatter'),
                 x=pred_x,
                 y=pred_y,
                 mode='markers',
@@ -1258,23 +1879,8 @@ def create_ml_predictions_map(existing_wells: pd.DataFrame,
                 '<extra></extra>'
             ))
 
-    # 3. Настраиваем layout
-    fig.update_layout(
-        title="Карта скважин с ML предсказаниями",
-        xaxis=dict(
-            title="Координата X (м)",
-            scaleanchor="y",
-            scaleratio=1
-        ),
-        yaxis=dict(
-            title="Координата Y (м)",
-            scaleanchor="x",
-            scaleratio=1
-        ),
-        width=800,
-        height=600,
-        template='plotly_white'
-    )
+    # 3. Макет статичен — передаётся при создании фигуры одним словарём
+    fig = go.Figure(data=traces, layout=_ML_MAP_LAYOUT)
 
     return fig
 
@@ -1290,14 +1896,23 @@ def create_ml_prediction_details(prediction_data: Dict) -> go.Figure:
         Plotly Figure с графиком предсказаний
     """
 
-    fig = go.Figure()
-
-    depths = prediction_data['depth']
-    predictions = prediction_data['prediction']
+    # float32 хватает для осей с форматом .1f/.3f, payload вдвое меньше
+    depths = np.asarray(prediction_data['depth'], dtype=np.float32)
+    predictions = np.asarray(prediction_data['prediction'])
+    if predictions.dtype == np.float64:
+        predictions = predictions.astype(np.float32)
     well_name = prediction_data['well_name']
 
+    # Трейсы собираем обычными словарями и отдаём фигуре одним вызовом —
+    # без поаргументной валидации конструкторов go.Scatter
+    traces = []
+
+    # На длинных каротажах переключаемся на WebGL-рендер
+    trace_type = 'scattergl' if len(depths) > _WEBGL_THRESHOLD else 'scatter'
+
     # Основная кривая предсказаний
-    fig.add_trace(go.Scatter(
+    traces.append(dict(
+        type=trace_type,
         x=predictions,
         y=depths,
         mode='lines',
@@ -1309,6 +1924,39 @@ def create_ml_prediction_details(prediction_data: Dict) -> go.Figure:
         '<extra></extra>'
     ))
 
+    # Раскрашиваем зоны коллектора/неколлектора: один трейс с векторными
+    # цветом и размером маркеров вместо двух выборок по маске — без
+    # копий predictions/depths под каждую категорию
+    collector_mask = predictions > 0.5
+
+    # Однородный каротаж (всё коллектор или всё нет) — частый случай;
+    # одна SIMD-редукция count_nonzero дешевле построения двух
+    # покомпонентных массивов стилей
+    n_coll = np.count_nonzero(collector_mask)
+    if n_coll == 0:
+        color, size = 'gray', 4
+    elif n_coll == collector_mask.size:
+        color, size = 'green', 6
+    else:
+        color = np.where(collector_mask, 'green', 'gray')
+        size = np.where(collector_mask, 6, 4)
+
+    traces.append(dict(
+        type=trace_type,
+        x=predictions,
+        y=depths,
+        mode='markers',
+        marker=dict(color=color, size=size, symbol='circle'),
+        name='Коллектор/Неколлектор',
+        showlegend=False,
+        hoverinfo='skip'
+    ))
+
+    # Макет статичен, кроме заголовка — слияние с готовым словарём
+    fig = go.Figure(data=traces,
+                    layout=dict(_ML_DETAILS_LAYOUT,
+                                title=f"ML предсказания для скважины {well_name}"))
+
     # Добавляем порог 0.5 для определения коллектора
     fig.add_hline(
         y=0.5,
@@ -1318,63 +1966,6 @@ def create_ml_prediction_details(prediction_data: Dict) -> go.Figure:
         annotation_position="bottom right"
     )
 
-    # Раскрашиваем зоны коллектора/неколлектора
-    collector_mask = predictions > 0.5
-
-    # Зоны коллектора (зеленый)
-    if np.any(collector_mask):
-        fig.add_trace(go.Scatter(
-            x=predictions[collector_mask],
-            y=depths[collector_mask],
-            mode='markers',
-            marker=dict(
-                color='green',
-                size=6,
-                symbol='circle'
-            ),
-            name='Коллектор',
-            showlegend=False,
-            hoverinfo='skip'
-        ))
-
-    # Зоны неколлектора (серый)
-    if np.any(~collector_mask):
-        fig.add_trace(go.Scatter(
-            x=predictions[~collector_mask],
-            y=depths[~collector_mask],
-            mode='markers',
-            marker=dict(
-                color='gray',
-                size=4,
-                symbol='circle'
-            ),
-            name='Неколлектор',
-            showlegend=False,
-            hoverinfo='skip'
-        ))
-
-    # Настраиваем layout
-    fig.update_layout(
-        title=f"ML предсказания для скважины {well_name}",
-        xaxis=dict(
-            title="Вероятность коллектора",
-            range=[-0.1, 1.1]
-        ),
-        yaxis=dict(
-            title="Глубина (м)",
-            autorange="reversed"  # Глубина увеличивается вниз
-        ),
-        width=600,
-        height=800,
-        template='plotly_white',
-        showlegend=True,
-        legend=dict(
-            x=0.02,
-            y=0.98,
-            bgcolor='rgba(255,255,255,0.8)'
-        )
-    )
-
     return fig
 
 
@@ -1457,28 +2048,20 @@ def create_2d_section_with_kriging(well_data: pd.DataFrame, trajectories: Dict[s
         if well_name not in las_data or len(trajectory) < 2:
             continue
         
-        las = las_data[well_name]
-        depth = las['depth']
-        curve = las['curve']
-        null_value = las.get('null_value', -999.25)
-        
-        valid_mask = (curve != null_value) & (~np.isnan(curve))
-        if not np.any(valid_mask):
+        valid = _valid_las_samples(las_data[well_name])
+        if valid is None:
             continue
+        depth_valid, curve_valid = valid[0], valid[1]
+
+
+        # Один транспонированный срез даёт четыре непрерывных колонки
+        # вместо четырёх страйдовых видов
+        traj_x, traj_y, traj_z, traj_md = np.ascontiguousarray(trajectory.T)
         
-        depth_valid = depth[valid_mask]
-        curve_valid = curve[valid_mask]
-        
-        traj_x = trajectory[:, 0]
-        traj_y = trajectory[:, 1]
-        traj_z = trajectory[:, 2]
-        traj_md = trajectory[:, 3]
-        
-        # Интерполируем координаты
-        x_coords = np.interp(depth_valid, traj_md, traj_x)
-        y_coords = np.interp(depth_valid, traj_md, traj_y)
-        z_coords = np.interp(depth_valid, traj_md, traj_z)
-        
+        # Интерполируем координаты (один поиск по MD на все три оси)
+        x_coords, y_coords, z_coords = _interp_xyz(depth_valid, traj_md,
+                                                   traj_x, traj_y, traj_z)
+
         for i in range(len(curve_valid)):
             all_points.append({
                 'x': x_coords[i],
@@ -1502,8 +2085,9 @@ def create_2d_section_with_kriging(well_data: pd.DataFrame, trajectories: Dict[s
     z_proj = []
     values_proj = []
     
-    for _, point in points_df.iterrows():
-        px, py, pz, val = point['x'], point['y'], point['z'], point['value']
+    # itertuples вместо iterrows: без построения Series на каждую точку
+    for px, py, pz, val in points_df[['x', 'y', 'z', 'value']].itertuples(index=False,
+                                                                          name=None):
         
         # Находим ближайшую точку на профиле
         min_dist = float('inf')
@@ -1613,6 +2197,8 @@ def create_ml_comparison_chart(existing_wells: pd.DataFrame,
     """
     Создает сравнительную диаграмму существующих и предсказанных скважин
 
+    Результат мемоизируется по хэшу входов.
+
     Args:
         existing_wells: DataFrame с существующими скважинами
         predicted_wells: Словарь предсказаний
@@ -1620,61 +2206,54 @@ def create_ml_comparison_chart(existing_wells: pd.DataFrame,
     Returns:
         Plotly Figure со сравнением
     """
+    return _memoized_figure(
+        'create_ml_comparison_chart',
+        lambda: _build_ml_comparison_chart(existing_wells, predicted_wells),
+        existing_wells, predicted_wells
+    )
 
-    fig = go.Figure()
 
+def _build_ml_comparison_chart(existing_wells: pd.DataFrame,
+                               predicted_wells: Dict[str, Dict]) -> go.Figure:
+    """Собирает фигуру для create_ml_comparison_chart (без кэша)"""
     # Собираем данные для сравнения
     existing_ratios = []
     existing_names = []
 
-    if not existing_wells.empty:
-        for _, row in existing_wells.iterrows():
-            if pd.notna(row.get('Доля_коллектора')):
-                existing_ratios.append(row['Доля_коллектора'])
-                existing_names.append(row['Well'])
+    if not existing_wells.empty and 'Доля_коллектора' in existing_wells.columns:
+        # Колоночная фильтрация вместо прохода по строкам:
+        # одна notna-маска и две выборки колонок
+        mask = existing_wells['Доля_коллектора'].notna()
+        existing_ratios = existing_wells.loc[mask, 'Доля_коллектора'].tolist()
+        existing_names = existing_wells.loc[mask, 'Well'].tolist()
 
-    predicted_ratios = []
-    predicted_names = []
+    # Доли коллектора по предсказаниям считаются одной матричной редукцией
+    names, _, _, predicted_ratios = _predicted_ratios(predicted_wells)
+    predicted_names = [f"{name} (ML)" for name in names]
 
-    for well_name, pred_data in predicted_wells.items():
-        predictions = pred_data['prediction']
-        ratio = np.mean(predictions > 0.5)
-        predicted_ratios.append(ratio)
-        predicted_names.append(f"{well_name} (ML)")
-
-    # Создаем сравнительную диаграмму
+    # Создаем сравнительную диаграмму: трейсы-словари без валидации go.Bar
+    traces = []
     if existing_ratios:
-        fig.add_trace(go.Bar(
+        traces.append(dict(
+            type='bar',
             x=existing_names,
             y=existing_ratios,
             name='Реальные данные',
-            marker_color='blue',
+            marker=dict(color='blue'),
             opacity=0.7
         ))
 
-    if predicted_ratios:
-        fig.add_trace(go.Bar(
+    if predicted_names:
+        traces.append(dict(
+            type='bar',
             x=predicted_names,
             y=predicted_ratios,
             name='ML предсказания',
-            marker_color='red',
+            marker=dict(color='red'),
             opacity=0.7
         ))
 
-    fig.update_layout(
-        title="Сравнение доли коллектора: Реальные vs ML предсказания",
-        xaxis=dict(
-            title="Скважины",
-            tickangle=45
-        ),
-        yaxis=dict(
-            title="Доля коллектора",
-            range=[0, 1]
-        ),
-        width=800,
-        height=500,
-        template='plotly_white',
-        barmode='group'
-    )
+    # Макет статичен — передаётся при создании фигуры одним словарём
+    fig = go.Figure(data=traces, layout=_ML_CHART_LAYOUT)
 
     return fig